@@ -4,18 +4,30 @@ Web scrapes international space law statutes, treaties, and space events
 """
 import asyncio
 import logging
+import time
+from collections import OrderedDict
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import uvicorn
 from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 import httpx
-from bs4 import BeautifulSoup
-import json
+import lxml.html
+from lxml import etree
+import orjson
 import uuid
 import sys
 import os
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
 
 # Add parent directories to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
@@ -30,7 +42,8 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="Space Law Data Collection API",
     description="API for collecting international space law documents and events",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware
@@ -78,32 +91,310 @@ SPACE_LAW_SOURCES = {
 }
 
 
+# Maximum number of pages fetched concurrently by a scraper
+MAX_CONCURRENT_SCRAPES = 16
+# Size of the body chunks fed to the HTML parser while a page downloads
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Title and content candidates, matched by tag name or CSS class
+TITLE_TAGS = frozenset({"h1", "title", "h2"})
+TITLE_CLASSES = frozenset({"document-title", "page-title", "content-title", "article-title"})
+CONTENT_TAGS = frozenset({"main", "article"})
+CONTENT_CLASSES = frozenset({"content", "main-content", "article-content",
+                             "document-content", "post-content"})
+
+# Elements whose text never counts as document content
+NON_CONTENT_TAGS = frozenset({"script", "style", "nav", "footer", "header"})
+
+# Scraped documents are served from cache for this long (seconds) ...
+DOCUMENT_CACHE_TTL = 24 * 60 * 60
+# ... and kept for revalidation with If-None-Match / If-Modified-Since for this long
+DOCUMENT_CACHE_MAX_AGE = 7 * 24 * 60 * 60
+# Entry limit for the in-process cache used when Redis is not configured
+DOCUMENT_CACHE_MAX_ENTRIES = 1024
+
+def _class_xpath(axis: str, class_name: str) -> str:
+    """XPath equivalent of the CSS class selector .class_name"""
+    return f"{axis}*[contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')]"
+
+
+# News articles and their headlines on event source pages (matches in document order)
+EVENT_ARTICLE_XPATH = etree.XPath(
+    f"//article | {_class_xpath('//', 'article')} | {_class_xpath('//', 'news-item')}"
+)
+EVENT_TITLE_XPATH = etree.XPath(
+    f".//h1 | .//h2 | .//h3 | {_class_xpath('.//', 'title')} | {_class_xpath('.//', 'headline')}"
+)
+# Script and style text is not part of an article's visible text
+NON_TEXT_TAGS = ("script", "style")
+# Event descriptions keep this many leading characters of the article text
+EVENT_DESCRIPTION_LENGTH = 500
+
+# Extractive summaries keep this many leading sentences
+SUMMARY_SENTENCES = 3
+SENTENCE_DELIMITER = '. '
+
+# Space law keywords reported by _extract_keywords, in reporting order (all lowercase)
+SPACE_LAW_KEYWORDS = (
+    'outer space', 'space law', 'space treaty', 'space debris',
+    'satellite', 'launch', 'spacecraft', 'astronaut', 'cosmonaut',
+    'space station', 'moon treaty', 'liability convention',
+    'registration convention', 'rescue agreement', 'space exploration',
+    'space mining', 'space tourism', 'orbital debris', 'space traffic'
+)
+
+# Classification triggers, in priority order (first matching entry wins)
+LAW_TYPE_TRIGGERS = (
+    (LawType.TREATY, ('treaty', 'convention', 'agreement')),
+    (LawType.REGULATORY, ('regulation', 'rule', 'policy')),
+    (LawType.CASE_LAW, ('court', 'judgment', 'case')),
+)
+
+JURISDICTION_TRIGGERS = (
+    (Jurisdiction.UN, ('un', 'united nations', 'unoosa')),
+    (Jurisdiction.US, ('usa', 'united states', 'faa')),
+    (Jurisdiction.EU, ('eu', 'european union', 'esa')),
+    (Jurisdiction.RUSSIA, ('russia', 'russian')),
+    (Jurisdiction.CHINA, ('china', 'chinese')),
+    (Jurisdiction.INTERNATIONAL, ('international',)),
+)
+
+
+def _build_automaton(entries) -> Optional[Any]:
+    """Build an Aho-Corasick automaton from (word, value) pairs, if available"""
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for word, value in entries:
+        automaton.add_word(word, value)
+    automaton.make_automaton()
+    return automaton
+
+
+# Built once at import so each page is scanned in a single linear pass
+KEYWORD_AUTOMATON = _build_automaton((kw, kw) for kw in SPACE_LAW_KEYWORDS)
+CLASSIFIER_AUTOMATON = _build_automaton(
+    [(word, ('law_type', rank)) for rank, (_, words) in enumerate(LAW_TYPE_TRIGGERS) for word in words] +
+    [(word, ('jurisdiction', rank)) for rank, (_, words) in enumerate(JURISDICTION_TRIGGERS) for word in words]
+)
+
+
+_TEXT, _ENTER, _EXIT = range(3)
+
+
+def _parse_page(tree: lxml.html.HtmlElement) -> Tuple[Optional[str], str]:
+    """Extract the title and main content of a page in one pre-order walk.
+
+    The title is the text of the first title candidate with non-empty text.
+    The content is the text of the first content candidate, or of the whole
+    page if there is none. Text inside NON_CONTENT_TAGS is left out of the
+    content, and text pieces are stripped and concatenated.
+    """
+    page_parts, content_parts, title_parts = [], [], []
+    title = None
+    title_elem = content_elem = None
+    content_done = False
+    skip_depth = 0
+    
+    stack = [(_ENTER, tree)]
+    while stack:
+        action, node = stack.pop()
+        
+        if action == _TEXT:
+            text = node.strip()
+            if text:
+                if title_elem is not None:
+                    title_parts.append(text)
+                if not skip_depth:
+                    page_parts.append(text)
+                    if content_elem is not None:
+                        content_parts.append(text)
+            continue
+        
+        if action == _EXIT:
+            if node is title_elem:
+                title_elem = None
+                if title_parts:
+                    title = ''.join(title_parts)
+            if node is content_elem:
+                content_elem = None
+                content_done = True
+            if node.tag in NON_CONTENT_TAGS:
+                skip_depth -= 1
+            continue
+        
+        # Tails belong to the parent, so they are handled after the element exits
+        if node is not tree and node.tail:
+            stack.append((_TEXT, node.tail))
+        
+        tag = node.tag
+        if not isinstance(tag, str):
+            # Comments and processing instructions carry no text of their own
+            continue
+        
+        want_title = title is None and title_elem is None
+        # Content candidates inside non-content elements are ignored
+        want_content = (not content_done and content_elem is None
+                        and not skip_depth and tag not in NON_CONTENT_TAGS)
+        if want_title or want_content:
+            classes = node.get('class', '').split()
+            if want_title and (tag in TITLE_TAGS or not TITLE_CLASSES.isdisjoint(classes)):
+                title_elem = node
+                title_parts = []
+            if want_content and (tag in CONTENT_TAGS or not CONTENT_CLASSES.isdisjoint(classes)):
+                content_elem = node
+        
+        if tag in NON_CONTENT_TAGS:
+            skip_depth += 1
+        
+        stack.append((_EXIT, node))
+        stack.extend((_ENTER, child) for child in reversed(node))
+        if node.text:
+            stack.append((_TEXT, node.text))
+    
+    content = ''.join(content_parts if content_done else page_parts)
+    return title, content
+
+
+def _element_text(element: lxml.html.HtmlElement) -> str:
+    """Concatenate the stripped text of an element"""
+    return ''.join(text.strip() for text in element.itertext())
+
+
+def _text_prefix(element: lxml.html.HtmlElement, limit: int) -> str:
+    """First limit characters of _element_text, without walking the whole element"""
+    parts, total = [], 0
+    for text in element.itertext():
+        text = text.strip()
+        parts.append(text)
+        total += len(text)
+        if total >= limit:
+            break
+    return ''.join(parts)[:limit]
+
+
+def _html_parser(response: httpx.Response) -> lxml.html.HTMLParser:
+    """HTML parser for a response body.
+
+    A charset in the Content-Type header takes precedence over the page's own
+    declaration; otherwise lxml detects the encoding from the BOM or
+    <meta charset> itself, so no separate charset sniffing pass is needed.
+    """
+    return lxml.html.HTMLParser(encoding=response.charset_encoding)
+
+
+class DocumentCache:
+    """Cache of scraped documents keyed by URL.
+
+    Uses Redis when REDIS_URL is set and the client is installed, otherwise
+    an in-process LRU. Cache failures are logged and treated as misses.
+    """
+    
+    def __init__(self, redis_url: Optional[str] = None):
+        self.redis = None
+        if redis_url and aioredis is not None:
+            self.redis = aioredis.Redis.from_url(redis_url)
+        self._local: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+    
+    async def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """Return the cache entry for a URL, if any"""
+        key = f"doc:{url}"
+        try:
+            if self.redis is not None:
+                value = await self.redis.get(key)
+            else:
+                value = None
+                item = self._local.get(key)
+                if item and item[0] > time.time():
+                    self._local.move_to_end(key)
+                    value = item[1]
+            return orjson.loads(value) if value else None
+        except Exception as e:
+            logger.warning(f"Document cache read failed for {url}: {e}")
+            return None
+    
+    async def set(self, url: str, entry: Dict[str, Any]):
+        """Store the cache entry for a URL"""
+        key = f"doc:{url}"
+        value = orjson.dumps(entry).decode()
+        try:
+            if self.redis is not None:
+                await self.redis.set(key, value, ex=DOCUMENT_CACHE_MAX_AGE)
+            else:
+                self._local[key] = (time.time() + DOCUMENT_CACHE_MAX_AGE, value)
+                self._local.move_to_end(key)
+                while len(self._local) > DOCUMENT_CACHE_MAX_ENTRIES:
+                    self._local.popitem(last=False)
+        except Exception as e:
+            logger.warning(f"Document cache write failed for {url}: {e}")
+    
+    async def close(self):
+        """Close the Redis connection, if any"""
+        if self.redis is not None:
+            await self.redis.aclose()
+
+
 class SpaceLawScraper:
     """Space law document scraper"""
     
     def __init__(self):
-        self.session = httpx.AsyncClient(timeout=30.0)
+        # HTTP/2 multiplexes requests per host; Accept-Encoding advertises br
+        # automatically when the brotli decoder is installed
+        self.session = httpx.AsyncClient(
+            timeout=30.0,
+            http2=True,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32, keepalive_expiry=60)
+        )
+        # Bound the number of pages fetched and parsed at the same time
+        self.semaphore = asyncio.Semaphore(MAX_CONCURRENT_SCRAPES)
+        self.cache = DocumentCache(os.getenv('REDIS_URL'))
     
     async def scrape_document(self, url: str, category: str) -> Optional[SpaceLawDocument]:
         """Scrape a single document"""
+        async with self.semaphore:
+            return await self._scrape_document(url, category)
+    
+    async def _scrape_document(self, url: str, category: str) -> Optional[SpaceLawDocument]:
         try:
-            logger.info(f"Scraping document from: {url}")
-            response = await self.session.get(url)
-            response.raise_for_status()
+            entry = await self.cache.get(url)
+            if entry and time.time() - entry["fetched_at"] < DOCUMENT_CACHE_TTL:
+                return self._document_from_cache(entry)
+            
+            # Revalidate stale entries so unchanged pages are not downloaded again
+            headers = {}
+            if entry and entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry and entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            logger.info(f"Scraping document from: {url}")
+            async with self.session.stream("GET", url, headers=headers) as response:
+                if entry and response.status_code == 304:
+                    entry["fetched_at"] = time.time()
+                    await self.cache.set(url, entry)
+                    return self._document_from_cache(entry)
+                response.raise_for_status()
+                
+                # Parse while the body downloads instead of after it has arrived
+                parser = _html_parser(response)
+                async for chunk in response.aiter_bytes(STREAM_CHUNK_SIZE):
+                    parser.feed(chunk)
+                tree = parser.close()
             
-            # Extract title
-            title = self._extract_title(soup, url)
+            # Extract title and content in a single walk
+            title, content = _parse_page(tree)
             
-            # Extract content
-            content = self._extract_content(soup)
+            if not title:
+                # Fallback to URL-based title
+                title = url.split('/')[-1].replace('-', ' ').replace('_', ' ').title()
             
             # Determine law type and jurisdiction
-            law_type, jurisdiction = self._classify_document(soup, url, category)
+            content_lower = content.lower()
+            law_type, jurisdiction = self._classify_document(content_lower, url, category)
             
             # Extract keywords
-            keywords = self._extract_keywords(content, title)
+            keywords = self._extract_keywords(content_lower, title)
             
             # Generate summary
             summary = self._generate_summary(content)
@@ -125,127 +416,116 @@ class SpaceLawScraper:
                 }
             )
             
+            await self.cache.set(url, {
+                "fetched_at": time.time(),
+                "etag": response.headers.get("etag"),
+                "last_modified": response.headers.get("last-modified"),
+                "document": document.model_dump_json()
+            })
+            
             return document
             
         except Exception as e:
             logger.error(f"Error scraping {url}: {e}")
             return None
     
-    def _extract_title(self, soup: BeautifulSoup, url: str) -> str:
-        """Extract document title"""
-        # Try various title selectors
-        title_selectors = [
-            'h1', 'title', '.document-title', '.page-title', 
-            'h2', '.content-title', '.article-title'
-        ]
-        
-        for selector in title_selectors:
-            title_elem = soup.select_one(selector)
-            if title_elem and title_elem.get_text(strip=True):
-                return title_elem.get_text(strip=True)
-        
-        # Fallback to URL-based title
-        return url.split('/')[-1].replace('-', ' ').replace('_', ' ').title()
-    
-    def _extract_content(self, soup: BeautifulSoup) -> str:
-        """Extract main content from page"""
-        # Remove script and style elements
-        for script in soup(["script", "style", "nav", "footer", "header"]):
-            script.decompose()
-        
-        # Try to find main content areas
-        content_selectors = [
-            '.content', '.main-content', '.article-content', 
-            '.document-content', 'main', 'article', '.post-content'
-        ]
-        
-        for selector in content_selectors:
-            content_elem = soup.select_one(selector)
-            if content_elem:
-                return content_elem.get_text(strip=True)
-        
-        # Fallback to body text
-        return soup.get_text(strip=True)
+    def _document_from_cache(self, entry: Dict[str, Any]) -> SpaceLawDocument:
+        """Rebuild a cached document under a new id and collection time, as a fresh scrape would have
+
+        metadata["cached_from"] keeps the time the content was actually fetched.
+        """
+        document = SpaceLawDocument.model_validate_json(entry["document"])
+        now = datetime.utcnow()
+        metadata = dict(document.metadata)
+        metadata["cached_from"] = metadata.get("scraped_at")
+        metadata["scraped_at"] = now.isoformat()
+        return document.model_copy(update={"id": str(uuid.uuid4()), "date_collected": now, "metadata": metadata})
     
-    def _classify_document(self, soup: BeautifulSoup, url: str, category: str) -> tuple:
-        """Classify document type and jurisdiction"""
-        text = soup.get_text().lower()
+    def _classify_document(self, text: str, url: str, category: str) -> tuple:
+        """Classify document type and jurisdiction from lowercased content"""
+        if CLASSIFIER_AUTOMATON is not None:
+            # Single pass over the text, keeping the highest-priority hit per kind
+            law_rank, jurisdiction_rank = len(LAW_TYPE_TRIGGERS), len(JURISDICTION_TRIGGERS)
+            for _, (kind, rank) in CLASSIFIER_AUTOMATON.iter(text):
+                if kind == 'law_type':
+                    law_rank = min(law_rank, rank)
+                else:
+                    jurisdiction_rank = min(jurisdiction_rank, rank)
+                if law_rank == 0 and jurisdiction_rank == 0:
+                    break
+        else:
+            law_rank = next((rank for rank, (_, words) in enumerate(LAW_TYPE_TRIGGERS)
+                             if any(word in text for word in words)), len(LAW_TYPE_TRIGGERS))
+            jurisdiction_rank = next((rank for rank, (_, words) in enumerate(JURISDICTION_TRIGGERS)
+                                      if any(word in text for word in words)), len(JURISDICTION_TRIGGERS))
         
         # Determine law type
-        if any(word in text for word in ['treaty', 'convention', 'agreement']):
-            law_type = LawType.TREATY
-        elif any(word in text for word in ['regulation', 'rule', 'policy']):
-            law_type = LawType.REGULATORY
-        elif any(word in text for word in ['court', 'judgment', 'case']):
-            law_type = LawType.CASE_LAW
+        if law_rank < len(LAW_TYPE_TRIGGERS):
+            law_type = LAW_TYPE_TRIGGERS[law_rank][0]
         else:
             law_type = LawType.DOMESTIC
         
         # Determine jurisdiction
-        if 'un' in text or 'united nations' in text or 'unoosa' in text:
-            jurisdiction = Jurisdiction.UN
-        elif 'usa' in text or 'united states' in text or 'faa' in text:
-            jurisdiction = Jurisdiction.US
-        elif 'eu' in text or 'european union' in text or 'esa' in text:
-            jurisdiction = Jurisdiction.EU
-        elif 'russia' in text or 'russian' in text:
-            jurisdiction = Jurisdiction.RUSSIA
-        elif 'china' in text or 'chinese' in text:
-            jurisdiction = Jurisdiction.CHINA
-        elif 'international' in text:
-            jurisdiction = Jurisdiction.INTERNATIONAL
+        if jurisdiction_rank < len(JURISDICTION_TRIGGERS):
+            jurisdiction = JURISDICTION_TRIGGERS[jurisdiction_rank][0]
         else:
             jurisdiction = Jurisdiction.OTHER
         
         return law_type, jurisdiction
     
-    def _extract_keywords(self, content: str, title: str) -> List[str]:
-        """Extract keywords from content"""
+    def _extract_keywords(self, content_lower: str, title: str) -> List[str]:
+        """Extract keywords from lowercased content and the title"""
         # Simple keyword extraction (can be enhanced with NLP)
-        space_law_keywords = [
-            'outer space', 'space law', 'space treaty', 'space debris',
-            'satellite', 'launch', 'spacecraft', 'astronaut', 'cosmonaut',
-            'space station', 'moon treaty', 'liability convention',
-            'registration convention', 'rescue agreement', 'space exploration',
-            'space mining', 'space tourism', 'orbital debris', 'space traffic'
-        ]
+        text = content_lower + ' ' + title.lower()
         
-        text = (content + ' ' + title).lower()
-        found_keywords = [kw for kw in space_law_keywords if kw in text]
+        if KEYWORD_AUTOMATON is not None:
+            found = {kw for _, kw in KEYWORD_AUTOMATON.iter(text)}
+            found_keywords = [kw for kw in SPACE_LAW_KEYWORDS if kw in found]
+        else:
+            found_keywords = [kw for kw in SPACE_LAW_KEYWORDS if kw in text]
         
         return found_keywords[:10]  # Limit to 10 keywords
     
     def _generate_summary(self, content: str) -> str:
         """Generate a simple summary of the content"""
         # Simple extractive summarization (first few sentences)
-        sentences = content.split('. ')
-        summary_sentences = sentences[:3]  # First 3 sentences
-        return '. '.join(summary_sentences) + '.'
+        # Only scan up to the end of the last summary sentence
+        end = -len(SENTENCE_DELIMITER)
+        for _ in range(SUMMARY_SENTENCES):
+            end = content.find(SENTENCE_DELIMITER, end + len(SENTENCE_DELIMITER))
+            if end == -1:
+                return content + '.'
+        return content[:end] + '.'
     
     async def scrape_space_events(self, urls: List[str]) -> List[SpaceEvent]:
         """Scrape space events from news sources"""
+        results = await asyncio.gather(*(self._scrape_events_from(url) for url in urls))
+        return [event for events in results for event in events]
+    
+    async def _scrape_events_from(self, url: str) -> List[SpaceEvent]:
+        """Scrape space events from a single news source"""
         events = []
         
-        for url in urls:
+        async with self.semaphore:
             try:
                 response = await self.session.get(url)
                 response.raise_for_status()
-                soup = BeautifulSoup(response.content, 'html.parser')
+                tree = lxml.html.fromstring(response.content, parser=_html_parser(response))
+                etree.strip_elements(tree, *NON_TEXT_TAGS, with_tail=False)
                 
                 # Extract event information (implementation depends on source)
                 # This is a simplified version
-                articles = soup.find_all(['article', '.article', '.news-item'])
+                articles = EVENT_ARTICLE_XPATH(tree)[:5]  # Limit to 5 events per source
                 
-                for article in articles[:5]:  # Limit to 5 events per source
-                    title_elem = article.find(['h1', 'h2', 'h3', '.title', '.headline'])
-                    if title_elem:
-                        title = title_elem.get_text(strip=True)
-                        content = article.get_text(strip=True)
+                for article in articles:
+                    title_elems = EVENT_TITLE_XPATH(article)
+                    if title_elems:
+                        title = _element_text(title_elems[0])
                         
                         event = SpaceEvent(
                             id=str(uuid.uuid4()),
                             title=title,
-                            description=content[:500],  # First 500 chars
+                            description=_text_prefix(article, EVENT_DESCRIPTION_LENGTH),
                             event_type="space_news",
                             date_occurred=datetime.utcnow(),
                             metadata={"source_url": url}
@@ -258,8 +538,9 @@ class SpaceLawScraper:
         return events
     
     async def close(self):
-        """Close the HTTP session"""
+        """Close the HTTP session and document cache"""
         await self.session.aclose()
+        await self.cache.close()
 
 
 # Global scraper instance
@@ -280,6 +561,7 @@ async def startup_event():
 async def shutdown_event():
     """Cleanup on shutdown"""
     await scraper.close()
+    db_manager.close()
 
 
 @app.get("/health")
@@ -323,6 +605,22 @@ async def scrape_events(urls: List[str], background_tasks: BackgroundTasks):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Columns returned by the listing endpoints (document content is not listed)
+DOCUMENT_LIST_COLUMNS = (
+    "id, title, source_url, law_type, jurisdiction, date_collected, "
+    "keywords, summary, status, metadata"
+)
+EVENT_LIST_COLUMNS = (
+    "id, title, description, event_type, date_occurred, date_collected, "
+    "participants, location, legal_implications, metadata"
+)
+
+
+def _decode_json(value: Optional[str]) -> Any:
+    """Decode a JSON column, passing empty values through unchanged"""
+    return orjson.loads(value) if value else value
+
+
 @app.get("/documents", response_model=APIResponse)
 async def get_documents(
     limit: int = 50,
@@ -332,42 +630,41 @@ async def get_documents(
 ):
     """Get collected documents with optional filters"""
     try:
-        with db_manager.get_connection() as conn:
+        filter_sql = ""
+        filter_params = []
+        
+        if law_type:
+            filter_sql += " AND law_type = ?"
+            filter_params.append(law_type)
+        
+        if jurisdiction:
+            filter_sql += " AND jurisdiction = ?"
+            filter_params.append(jurisdiction)
+        
+        def select_documents(conn):
             cursor = conn.cursor()
+            query = (f"SELECT {DOCUMENT_LIST_COLUMNS} FROM space_law_documents WHERE 1=1{filter_sql}"
+                     " ORDER BY date_collected DESC LIMIT ? OFFSET ?")
+            cursor.execute(query, filter_params + [limit, offset])
             
-            query = "SELECT * FROM space_law_documents WHERE 1=1"
-            params = []
-            
-            if law_type:
-                query += " AND law_type = ?"
-                params.append(law_type)
-            
-            if jurisdiction:
-                query += " AND jurisdiction = ?"
-                params.append(jurisdiction)
-            
-            query += " ORDER BY date_collected DESC LIMIT ? OFFSET ?"
-            params.extend([limit, offset])
-            
-            cursor.execute(query, params)
-            rows = cursor.fetchall()
-            
-            documents = []
-            for row in rows:
-                doc = dict(row)
-                # Convert JSON fields back to Python objects
-                if doc.get('keywords'):
-                    doc['keywords'] = json.loads(doc['keywords'])
-                if doc.get('metadata'):
-                    doc['metadata'] = json.loads(doc['metadata'])
-                documents.append(doc)
-            
-            return APIResponse(
-                success=True,
-                message=f"Retrieved {len(documents)} documents",
-                data={"documents": documents, "total": len(documents)}
-            )
+            # Convert JSON fields back to Python objects
+            documents = [
+                dict(row, keywords=_decode_json(row['keywords']), metadata=_decode_json(row['metadata']))
+                for row in cursor.fetchall()
+            ]
             
+            # Total matching documents, independent of the requested page
+            cursor.execute(f"SELECT COUNT(*) FROM space_law_documents WHERE 1=1{filter_sql}", filter_params)
+            return documents, cursor.fetchone()[0]
+        
+        documents, total = await db_manager.read(select_documents)
+        
+        return APIResponse(
+            success=True,
+            message=f"Retrieved {len(documents)} documents",
+            data={"documents": documents, "total": total}
+        )
+        
     except Exception as e:
         logger.error(f"Error retrieving documents: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -377,82 +674,106 @@ async def get_documents(
 async def get_events(limit: int = 50, offset: int = 0):
     """Get collected space events"""
     try:
-        with db_manager.get_connection() as conn:
+        def select_events(conn):
             cursor = conn.cursor()
             cursor.execute(
-                "SELECT * FROM space_events ORDER BY date_occurred DESC LIMIT ? OFFSET ?",
+                f"SELECT {EVENT_LIST_COLUMNS} FROM space_events ORDER BY date_occurred DESC LIMIT ? OFFSET ?",
                 (limit, offset)
             )
-            rows = cursor.fetchall()
-            
-            events = []
-            for row in rows:
-                event = dict(row)
-                if event.get('participants'):
-                    event['participants'] = json.loads(event['participants'])
-                if event.get('metadata'):
-                    event['metadata'] = json.loads(event['metadata'])
-                events.append(event)
             
-            return APIResponse(
-                success=True,
-                message=f"Retrieved {len(events)} events",
-                data={"events": events, "total": len(events)}
-            )
+            events = [
+                dict(row, participants=_decode_json(row['participants']), metadata=_decode_json(row['metadata']))
+                for row in cursor.fetchall()
+            ]
             
+            # Total stored events, independent of the requested page
+            cursor.execute("SELECT COUNT(*) FROM space_events")
+            return events, cursor.fetchone()[0]
+        
+        events, total = await db_manager.read(select_events)
+        
+        return APIResponse(
+            success=True,
+            message=f"Retrieved {len(events)} events",
+            data={"events": events, "total": total}
+        )
+        
     except Exception as e:
         logger.error(f"Error retrieving events: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Insert statements shared by every batch, so the reused SQLite connection
+# prepares each one once and serves it from its statement cache afterwards
+DOCUMENT_INSERT_SQL = """
+    INSERT INTO space_law_documents 
+    (id, title, content, source_url, law_type, jurisdiction, 
+     date_collected, keywords, summary, status, metadata)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+EVENT_INSERT_SQL = """
+    INSERT INTO space_events 
+    (id, title, description, event_type, date_occurred, date_collected, 
+     participants, metadata)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
 async def process_documents(urls: List[str], categories: List[str]):
     """Background task to process document scraping"""
-    for url in urls:
-        try:
-            document = await scraper.scrape_document(url, categories[0] if categories else "general")
-            if document:
-                # Save to database
-                with db_manager.get_connection() as conn:
-                    cursor = conn.cursor()
-                    cursor.execute("""
-                        INSERT INTO space_law_documents 
-                        (id, title, content, source_url, law_type, jurisdiction, 
-                         date_collected, keywords, summary, status, metadata)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        document.id, document.title, document.content, document.source_url,
-                        document.law_type.value, document.jurisdiction.value,
-                        document.date_collected, json.dumps(document.keywords),
-                        document.summary, document.status.value, json.dumps(document.metadata)
-                    ))
-                    conn.commit()
-                    logger.info(f"Saved document: {document.title}")
-        except Exception as e:
-            logger.error(f"Error processing document from {url}: {e}")
+    category = categories[0] if categories else "general"
+    documents = await asyncio.gather(
+        *(scraper.scrape_document(url, category) for url in urls),
+        return_exceptions=True
+    )
+    
+    rows = []
+    for url, document in zip(urls, documents):
+        if isinstance(document, Exception):
+            logger.error(f"Error processing document from {url}: {document}")
+        elif document:
+            # Enum fields are stored as plain values (use_enum_values)
+            rows.append((
+                document.id, document.title, document.content, document.source_url,
+                document.law_type, document.jurisdiction,
+                document.date_collected, orjson.dumps(document.keywords).decode(),
+                document.summary, document.status, orjson.dumps(document.metadata).decode()
+            ))
+    
+    if not rows:
+        return
+    
+    # Save all documents in a single transaction
+    try:
+        await db_manager.insert_many(DOCUMENT_INSERT_SQL, rows)
+        logger.info(f"Saved {len(rows)} documents")
+    except Exception as e:
+        logger.error(f"Error saving documents: {e}")
 
 
 async def process_events(urls: List[str]):
     """Background task to process event scraping"""
     events = await scraper.scrape_space_events(urls)
     
-    for event in events:
-        try:
-            with db_manager.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    INSERT INTO space_events 
-                    (id, title, description, event_type, date_occurred, date_collected, 
-                     participants, metadata)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    event.id, event.title, event.description, event.event_type,
-                    event.date_occurred, event.date_collected,
-                    json.dumps(event.participants), json.dumps(event.metadata)
-                ))
-                conn.commit()
-                logger.info(f"Saved event: {event.title}")
-        except Exception as e:
-            logger.error(f"Error saving event {event.title}: {e}")
+    if not events:
+        return
+    
+    rows = [
+        (
+            event.id, event.title, event.description, event.event_type,
+            event.date_occurred, event.date_collected,
+            orjson.dumps(event.participants).decode(), orjson.dumps(event.metadata).decode()
+        )
+        for event in events
+    ]
+    
+    # Save all events in a single transaction
+    try:
+        await db_manager.insert_many(EVENT_INSERT_SQL, rows)
+        logger.info(f"Saved {len(rows)} events")
+    except Exception as e:
+        logger.error(f"Error saving events: {e}")
 
 
 if __name__ == "__main__":
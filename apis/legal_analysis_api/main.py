@@ -5,17 +5,26 @@ Processes classified data to distinguish customary from treaty law and identify
 import asyncio
 import logging
 from datetime import datetime
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Iterable, Optional, Tuple
 import uvicorn
 from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-import json
+import orjson
 import uuid
 import sys
 import os
 import re
 from collections import defaultdict, Counter
+from itertools import islice
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+try:
+    import re2
+except ImportError:
+    re2 = None
 
 # Add parent directories to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
@@ -62,22 +71,109 @@ class JurisdictionalAnalysisRequest(BaseModel):
 class CustomaryLawIndicators:
     """Indicators for identifying customary international law"""
     
-    CUSTOMARY_INDICATORS = [
+    CUSTOMARY_INDICATORS = (
         "state practice", "opinio juris", "general practice", "accepted as law",
         "consistent practice", "widespread acceptance", "universal recognition",
         "long-standing practice", "established custom", "international custom"
-    ]
+    )
     
-    TREATY_INDICATORS = [
+    TREATY_INDICATORS = (
         "treaty", "convention", "agreement", "protocol", "signed", "ratified",
         "entered into force", "signatory", "party to", "binding obligation"
-    ]
+    )
     
-    JUS_COGENS_INDICATORS = [
+    JUS_COGENS_INDICATORS = (
         "peremptory norm", "jus cogens", "fundamental principle", "non-derogable",
         "absolute prohibition", "universal prohibition", "overriding norm",
         "hierarchy of norms", "superior norm"
-    ]
+    )
+
+
+# Indicator families counted by LegalAnalyzer._count_indicators
+INDICATOR_CATEGORIES = (
+    ("customary", CustomaryLawIndicators.CUSTOMARY_INDICATORS),
+    ("treaty", CustomaryLawIndicators.TREATY_INDICATORS),
+    ("jus_cogens", CustomaryLawIndicators.JUS_COGENS_INDICATORS),
+)
+
+
+def _build_indicator_automaton() -> Optional[Any]:
+    """Build one Aho-Corasick automaton over every indicator, if available"""
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for category, indicators in INDICATOR_CATEGORIES:
+        for index, indicator in enumerate(indicators):
+            automaton.add_word(indicator, (category, index))
+    automaton.make_automaton()
+    return automaton
+
+
+INDICATOR_AUTOMATON = _build_indicator_automaton()
+INDICATOR_COUNT = sum(len(indicators) for _, indicators in INDICATOR_CATEGORIES)
+
+# Jus cogens score by number of distinct indicators found; three or more share the top score
+JUS_COGENS_SCORES = (0.2, 0.4, 0.6, 0.8)
+
+# Common space law principles that might qualify as jus cogens
+SPACE_PRINCIPLES = (
+    "peaceful use of outer space",
+    "non-appropriation of outer space",
+    "freedom of exploration and use",
+    "benefit and interests of all countries",
+    "international cooperation",
+    "state responsibility for national activities",
+    "avoidance of harmful contamination"
+)
+
+
+def _build_principle_automaton() -> Optional[Any]:
+    """Build an Aho-Corasick automaton over the space law principles, if available"""
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for principle in SPACE_PRINCIPLES:
+        automaton.add_word(principle, principle)
+    automaton.make_automaton()
+    return automaton
+
+
+PRINCIPLE_AUTOMATON = _build_principle_automaton()
+
+# Legal language patterns, one named group per pattern, compiled once at import.
+# Prohibitive comes first so "shall not" is seen whole; its "shall" also counts as binding.
+LEGAL_PATTERN_NAMES = (
+    "binding_language", "recommendatory_language", "prohibitive_language",
+    "rights_language", "duty_language"
+)
+LEGAL_PATTERNS_RE = re.compile(
+    r'\b(?:(?P<prohibitive_language>prohibited|forbidden|not allowed|shall not)'
+    r'|(?P<binding_language>shall|must|obliged|required|binding)'
+    r'|(?P<recommendatory_language>should|may|encouraged|recommended)'
+    r'|(?P<rights_language>right|entitled|privilege|freedom)'
+    r'|(?P<duty_language>duty|obligation|responsibility|liability))\b'
+)
+
+# References to treaties, laws and principles
+LEGAL_BASIS_PATTERNS = (
+    r'\b[A-Z][a-z]+ (?:\w+ )*(?:Treaty|Convention|Agreement|Act|Law|Code)\b',
+    r'\b(?:principle|rule|norm) (?:of|for) [a-z\s]+\b',
+)
+LEGAL_BASIS_RES = tuple(re.compile(pattern) for pattern in LEGAL_BASIS_PATTERNS)
+# RE2 runs these in linear time where re backtracks quadratically over long word runs.
+# Its \w and \b are ASCII-only, so it is used for ASCII text only, where both agree.
+LEGAL_BASIS_RE2S = tuple(re2.compile(pattern) for pattern in LEGAL_BASIS_PATTERNS) if re2 is not None else None
+
+# At most this many distinct legal basis references are reported
+LEGAL_BASIS_LIMIT = 10
+
+# Conflict indicators, the context captured around each of them, and how many are kept per indicator
+CONFLICT_KEYWORDS = ('conflict', 'dispute', 'overlap', 'contradiction', 'incompatible')
+CONFLICT_CONTEXT_RES = {
+    keyword: re.compile(rf'.{{0,50}}{keyword}.{{0,50}}', re.IGNORECASE)
+    for keyword in CONFLICT_KEYWORDS
+}
+CONFLICTS_PER_KEYWORD = 3
 
 
 class LegalAnalyzer:
@@ -86,15 +182,14 @@ class LegalAnalyzer:
     def __init__(self):
         self.customary_indicators = CustomaryLawIndicators()
     
-    async def analyze_customary_vs_treaty(self, document: Dict[str, Any]) -> Dict[str, Any]:
+    def analyze_customary_vs_treaty(self, document: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze whether a document represents customary or treaty law"""
         content = (document.get('content', '') + ' ' + document.get('title', '')).lower()
         
         # Count indicators
-        customary_count = sum(1 for indicator in self.customary_indicators.CUSTOMARY_INDICATORS 
-                            if indicator in content)
-        treaty_count = sum(1 for indicator in self.customary_indicators.TREATY_INDICATORS 
-                         if indicator in content)
+        counts = self._count_indicators(content)
+        customary_count = counts["customary"]
+        treaty_count = counts["treaty"]
         
         # Analyze patterns
         patterns = self._analyze_legal_patterns(content)
@@ -111,7 +206,7 @@ class LegalAnalyzer:
             confidence = 0.5
         
         # Check for jus cogens indicators
-        jus_cogens_score = self._calculate_jus_cogens_score(content)
+        jus_cogens_score = self._calculate_jus_cogens_score(counts["jus_cogens"])
         
         return {
             "classification": classification,
@@ -125,30 +220,42 @@ class LegalAnalyzer:
     
     def _analyze_legal_patterns(self, content: str) -> Dict[str, Any]:
         """Analyze legal language patterns"""
-        patterns = {
-            "binding_language": len(re.findall(r'\b(shall|must|obliged|required|binding)\b', content)),
-            "recommendatory_language": len(re.findall(r'\b(should|may|encouraged|recommended)\b', content)),
-            "prohibitive_language": len(re.findall(r'\b(prohibited|forbidden|not allowed|shall not)\b', content)),
-            "rights_language": len(re.findall(r'\b(right|entitled|privilege|freedom)\b', content)),
-            "duty_language": len(re.findall(r'\b(duty|obligation|responsibility|liability)\b', content))
-        }
+        counts = Counter()
+        for match in LEGAL_PATTERNS_RE.finditer(content):
+            counts[match.lastgroup] += 1
+            if match.lastgroup == "prohibitive_language" and match.group().startswith("shall"):
+                counts["binding_language"] += 1
+        
+        patterns = {name: counts[name] for name in LEGAL_PATTERN_NAMES}
         
         return patterns
     
-    def _calculate_jus_cogens_score(self, content: str) -> float:
-        """Calculate jus cogens score for the content"""
-        jus_cogens_count = sum(1 for indicator in self.customary_indicators.JUS_COGENS_INDICATORS 
-                             if indicator in content)
-        
+    def _count_indicators(self, content: str) -> Counter:
+        """Count the distinct indicators of each family present in lowercased content"""
+        if INDICATOR_AUTOMATON is not None:
+            # One pass over the content for every indicator family, ending early
+            # once every indicator has been seen since nothing more can change
+            found = set()
+            for _, value in INDICATOR_AUTOMATON.iter(content):
+                found.add(value)
+                if len(found) == INDICATOR_COUNT:
+                    break
+            return Counter(category for category, _ in found)
+        
+        # Fallback: one C substring search per indicator, counted without generator frames
+        counts = Counter()
+        for category, indicators in INDICATOR_CATEGORIES:
+            hits = 0
+            for indicator in indicators:
+                if indicator in content:
+                    hits += 1
+            counts[category] = hits
+        return counts
+    
+    def _calculate_jus_cogens_score(self, jus_cogens_count: int) -> float:
+        """Calculate jus cogens score from the number of indicators found"""
         # Base score on presence of jus cogens indicators
-        if jus_cogens_count >= 3:
-            return 0.8
-        elif jus_cogens_count >= 2:
-            return 0.6
-        elif jus_cogens_count >= 1:
-            return 0.4
-        else:
-            return 0.2
+        return JUS_COGENS_SCORES[min(jus_cogens_count, len(JUS_COGENS_SCORES) - 1)]
     
     def _generate_reasoning(self, classification: str, customary_count: int, treaty_count: int) -> str:
         """Generate reasoning for the classification"""
@@ -159,32 +266,28 @@ class LegalAnalyzer:
         else:
             return f"Mixed classification due to similar indicators for both treaty ({treaty_count}) and customary ({customary_count}) law."
     
-    async def analyze_jurisdictional_boundaries(self, documents: List[Dict[str, Any]]) -> List[JurisdictionalBoundary]:
+    def analyze_jurisdictional_boundaries(self, documents: Iterable[Dict[str, Any]]) -> List[JurisdictionalBoundary]:
         """Analyze jurisdictional boundaries from documents"""
-        boundaries = []
-        
         # Group documents by jurisdiction
         jurisdiction_docs = defaultdict(list)
         for doc in documents:
             jurisdiction_docs[doc.get('jurisdiction', 'other')].append(doc)
         
         # Analyze each jurisdiction
-        for jurisdiction, docs in jurisdiction_docs.items():
-            boundary = await self._analyze_jurisdiction_boundary(jurisdiction, docs)
-            boundaries.append(boundary)
-        
-        return boundaries
+        return [
+            self._analyze_jurisdiction_boundary(jurisdiction, docs)
+            for jurisdiction, docs in jurisdiction_docs.items()
+        ]
     
-    async def _analyze_jurisdiction_boundary(self, jurisdiction: str, documents: List[Dict[str, Any]]) -> JurisdictionalBoundary:
+    def _analyze_jurisdiction_boundary(self, jurisdiction: str, documents: List[Dict[str, Any]]) -> JurisdictionalBoundary:
         """Analyze boundary for a specific jurisdiction"""
-        all_content = ' '.join([doc.get('content', '') + ' ' + doc.get('title', '') 
-                               for doc in documents])
+        texts = [doc.get('content', '') + ' ' + doc.get('title', '') for doc in documents]
         
         # Extract legal basis
-        legal_basis = self._extract_legal_basis(all_content)
+        legal_basis = self._extract_legal_basis(texts)
         
         # Identify conflicts
-        conflicts = self._identify_jurisdictional_conflicts(all_content, jurisdiction)
+        conflicts = self._identify_jurisdictional_conflicts(texts, jurisdiction)
         
         # Calculate confidence based on document count and content quality
         confidence = min(0.9, 0.5 + (len(documents) * 0.05) + (len(legal_basis) * 0.1))
@@ -201,71 +304,70 @@ class LegalAnalyzer:
         
         return boundary
     
-    def _extract_legal_basis(self, content: str) -> List[str]:
-        """Extract legal basis from content"""
-        # Look for references to specific treaties, laws, or principles
-        legal_references = re.findall(r'\b[A-Z][a-z]+ (?:\w+ )*(?:Treaty|Convention|Agreement|Act|Law|Code)\b', content)
-        legal_principles = re.findall(r'\b(?:principle|rule|norm) (?:of|for) [a-z\s]+\b', content)
-        
-        return list(set(legal_references + legal_principles))[:10]  # Limit to 10
+    def _extract_legal_basis(self, texts: List[str]) -> List[str]:
+        """Extract legal basis from document texts"""
+        # Look for references to specific treaties, laws, or principles, stopping at 10
+        legal_basis = {}
+        for text in texts:
+            patterns = LEGAL_BASIS_RE2S if LEGAL_BASIS_RE2S is not None and text.isascii() else LEGAL_BASIS_RES
+            for pattern in patterns:
+                for match in pattern.finditer(text):
+                    legal_basis.setdefault(match.group(), None)
+                    if len(legal_basis) >= LEGAL_BASIS_LIMIT:
+                        return list(legal_basis)
+        
+        return list(legal_basis)
     
-    def _identify_jurisdictional_conflicts(self, content: str, jurisdiction: str) -> List[str]:
+    def _identify_jurisdictional_conflicts(self, texts: List[str], jurisdiction: str) -> List[str]:
         """Identify potential jurisdictional conflicts"""
         conflicts = []
+        lowered = [text.lower() for text in texts]
         
         # Look for conflict indicators
-        conflict_keywords = ['conflict', 'dispute', 'overlap', 'contradiction', 'incompatible']
-        for keyword in conflict_keywords:
-            if keyword in content.lower():
-                # Extract context around the conflict
-                pattern = rf'.{{0,50}}{keyword}.{{0,50}}'
-                matches = re.findall(pattern, content, re.IGNORECASE)
-                conflicts.extend(matches[:3])  # Limit to 3 conflicts
+        for keyword in CONFLICT_KEYWORDS:
+            matches = []
+            for text, text_lower in zip(texts, lowered):
+                if keyword in text_lower:
+                    # Extract context around the conflict, stopping at the limit
+                    remaining = CONFLICTS_PER_KEYWORD - len(matches)
+                    matches.extend(m.group() for m in islice(CONFLICT_CONTEXT_RES[keyword].finditer(text), remaining))
+                    if len(matches) >= CONFLICTS_PER_KEYWORD:
+                        break
+            conflicts.extend(matches)
         
         return conflicts
     
-    async def generate_jus_cogens_recommendations(self, documents: List[Dict[str, Any]]) -> List[JusCogensRecommendation]:
+    def generate_jus_cogens_recommendations(self, documents: Iterable[Dict[str, Any]]) -> List[JusCogensRecommendation]:
         """Generate jus cogens recommendations based on document analysis"""
-        recommendations = []
-        
-        # Analyze all documents for jus cogens patterns
-        all_content = ' '.join([doc.get('content', '') for doc in documents])
-        
-        # Identify potential jus cogens principles
-        principles = self._identify_jus_cogens_principles(all_content)
-        
-        for principle in principles:
-            recommendation = await self._create_jus_cogens_recommendation(principle, documents)
-            recommendations.append(recommendation)
-        
-        return recommendations
+        return self.recommend_jus_cogens(self.collect_jus_cogens_support(documents))
+    
+    def collect_jus_cogens_support(self, documents: Iterable[Dict[str, Any]],
+                                   support: Optional[Dict[str, List[str]]] = None) -> Dict[str, List[str]]:
+        """Map each principle to the ids of documents mentioning it, adding to support if given"""
+        # One pass per document finds its principles and records it as support
+        if support is None:
+            support = defaultdict(list)
+        for doc in documents:
+            for principle in self._find_jus_cogens_principles(doc.get('content', '').lower()):
+                support[principle].append(doc['id'])
+        return support
     
-    def _identify_jus_cogens_principles(self, content: str) -> List[str]:
-        """Identify potential jus cogens principles from content"""
-        principles = []
-        
-        # Common space law principles that might qualify as jus cogens
-        space_principles = [
-            "peaceful use of outer space",
-            "non-appropriation of outer space",
-            "freedom of exploration and use",
-            "benefit and interests of all countries",
-            "international cooperation",
-            "state responsibility for national activities",
-            "avoidance of harmful contamination"
+    def recommend_jus_cogens(self, support: Dict[str, List[str]]) -> List[JusCogensRecommendation]:
+        """Build one recommendation per supported principle, in SPACE_PRINCIPLES order"""
+        return [
+            self._create_jus_cogens_recommendation(principle, support[principle])
+            for principle in SPACE_PRINCIPLES if principle in support
         ]
+    
+    def _find_jus_cogens_principles(self, content: str) -> set:
+        """Find the potential jus cogens principles present in lowercased content"""
+        if PRINCIPLE_AUTOMATON is not None:
+            return {principle for _, principle in PRINCIPLE_AUTOMATON.iter(content)}
         
-        for principle in space_principles:
-            if principle in content.lower():
-                principles.append(principle)
-        
-        return principles
+        return {principle for principle in SPACE_PRINCIPLES if principle in content}
     
-    async def _create_jus_cogens_recommendation(self, principle: str, documents: List[Dict[str, Any]]) -> JusCogensRecommendation:
+    def _create_jus_cogens_recommendation(self, principle: str, supporting_docs: List[str]) -> JusCogensRecommendation:
         """Create a jus cogens recommendation for a specific principle"""
-        # Find supporting documents
-        supporting_docs = [doc['id'] for doc in documents if principle in doc.get('content', '').lower()]
-        
         # Calculate recommendation strength
         strength = min(0.9, 0.3 + (len(supporting_docs) * 0.1))
         
@@ -283,14 +385,118 @@ class LegalAnalyzer:
         return recommendation
 
 
+def _decode_json(value: Optional[str]) -> Any:
+    """Decode a JSON column, passing empty values through unchanged"""
+    return orjson.loads(value) if value else value
+
+
+def _keyset_filter(date_column: str, before: Optional[str], before_id: Optional[str]) -> Tuple[str, List[Any]]:
+    """SQL condition and parameters selecting rows after a keyset cursor in newest-first order"""
+    if before is None:
+        return "", []
+    if before_id is None:
+        return f" AND {date_column} < ?", [before]
+    return f" AND ({date_column} < ? OR ({date_column} = ? AND id < ?))", [before, before, before_id]
+
+
+def _next_cursor(rows: List[Dict[str, Any]], date_column: str, limit: int) -> Optional[Dict[str, Any]]:
+    """Keyset cursor for the page after rows, or None on the last page"""
+    if not rows or len(rows) < limit:
+        return None
+    return {"before": rows[-1][date_column], "before_id": rows[-1]["id"]}
+
+
 # Global analyzer instance
 analyzer = LegalAnalyzer()
 
 
+# Queued inserts are committed together once this many rows arrive or the interval elapses
+WRITE_BATCH_SIZE = 200
+WRITE_FLUSH_INTERVAL = 0.05
+
+
+class BatchWriter:
+    """Commits inserts queued by request handlers from a single background task.
+
+    Rows are grouped by statement and written with one executemany per
+    statement and one commit per batch. Until the task is started, rows
+    are written immediately instead.
+    """
+    
+    def __init__(self, batch_size: int = WRITE_BATCH_SIZE, flush_interval: float = WRITE_FLUSH_INTERVAL):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "asyncio.Queue[Optional[Tuple[str, Tuple]]]" = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self):
+        """Start the background writer task"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    async def submit(self, sql: str, rows: List[Tuple]):
+        """Queue rows for insertion with the given statement"""
+        if self._task is None:
+            await self._flush([(sql, row) for row in rows])
+            return
+        for row in rows:
+            self._queue.put_nowait((sql, row))
+    
+    async def close(self):
+        """Write everything still queued and stop the background task"""
+        if self._task is not None:
+            await self._queue.put(None)
+            await self._task
+            self._task = None
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+    
+    async def _flush(self, batch: List[Tuple[str, Tuple]]):
+        grouped = defaultdict(list)
+        for sql, row in batch:
+            grouped[sql].append(row)
+        
+        def write_batch(conn):
+            cursor = conn.cursor()
+            for sql, rows in grouped.items():
+                cursor.executemany(sql, rows)
+            conn.commit()
+        
+        try:
+            await db_manager.write(write_batch)
+        except Exception as e:
+            logger.error(f"Error writing {len(batch)} queued rows: {e}")
+
+
+batch_writer = BatchWriter()
+
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize on startup"""
     try:
+        batch_writer.start()
         logger.info("Legal Analysis API started successfully")
     except Exception as e:
         logger.error(f"Startup error: {e}")
@@ -298,46 +504,116 @@ async def startup_event():
         pass
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Cleanup on shutdown"""
+    await batch_writer.close()
+    db_manager.close()
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "timestamp": datetime.utcnow()}
 
 
+ANALYSIS_DOCUMENT_COLUMNS = "id, title, content"
+
+ANALYSIS_INSERT_SQL = """
+    INSERT INTO legal_analyses 
+    (id, document_id, analysis_type, results, confidence_score, date_analyzed, methodology)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Returned for documents that cannot be loaded, e.g. when the database is unavailable
+MOCK_CUSTOMARY_VS_TREATY_ANALYSIS = {
+    "classification": "mixed_or_uncertain",
+    "confidence_score": 0.65,
+    "customary_indicators_found": 2,
+    "treaty_indicators_found": 3,
+    "jus_cogens_score": 0.4,
+    "legal_patterns": {
+        "binding_language": 5,
+        "recommendatory_language": 3,
+        "prohibitive_language": 2,
+        "rights_language": 4,
+        "duty_language": 3
+    },
+    "reasoning": "Document shows both customary and treaty law characteristics based on identified indicators."
+}
+
+
+def _analyze_one(document: Dict[str, Any]) -> Tuple[Dict[str, Any], Tuple]:
+    """Analyze one stored document and build its legal_analyses row"""
+    analysis = analyzer.analyze_customary_vs_treaty(document)
+    record = LegalAnalysis(
+        id=str(uuid.uuid4()),
+        document_id=document["id"],
+        analysis_type="customary_vs_treaty",
+        results=analysis,
+        confidence_score=analysis["confidence_score"],
+        methodology="indicator_and_pattern_analysis"
+    )
+    row = (
+        record.id, record.document_id, record.analysis_type,
+        orjson.dumps(record.results).decode(), record.confidence_score,
+        record.date_analyzed, record.methodology
+    )
+    return analysis, row
+
+
 @app.post("/analyze/customary-vs-treaty", response_model=APIResponse)
 async def analyze_customary_vs_treaty(request: AnalysisRequest):
     """Analyze documents to distinguish customary from treaty law"""
     try:
-        results = []
+        documents = {}
+        if request.document_ids:
+            def select_documents(conn):
+                cursor = conn.cursor()
+                placeholders = ", ".join("?" * len(request.document_ids))
+                cursor.execute(
+                    f"SELECT {ANALYSIS_DOCUMENT_COLUMNS} FROM space_law_documents WHERE id IN ({placeholders})",
+                    request.document_ids
+                )
+                return {row["id"]: dict(row) for row in cursor.fetchall()}
+            
+            try:
+                # Fetch every requested document in a single query
+                documents = await db_manager.read(select_documents)
+            except Exception as e:
+                logger.warning(f"Database unavailable, falling back to mock analysis: {e}")
+        
+        found_ids = [doc_id for doc_id in request.document_ids if doc_id in documents]
         
-        # For testing purposes, provide mock analysis if database is unavailable
+        # Analyses are independent per document; run them off the event loop together
+        analyzed = await asyncio.gather(*(
+            asyncio.to_thread(_analyze_one, documents[doc_id]) for doc_id in found_ids
+        ))
+        analyzed = iter(analyzed)
+        
+        results = []
+        rows = []
         for doc_id in request.document_ids:
-            # Create mock analysis for demonstration
-            mock_analysis = {
-                "classification": "mixed_or_uncertain",
-                "confidence_score": 0.65,
-                "customary_indicators_found": 2,
-                "treaty_indicators_found": 3,
-                "jus_cogens_score": 0.4,
-                "legal_patterns": {
-                    "binding_language": 5,
-                    "recommendatory_language": 3,
-                    "prohibitive_language": 2,
-                    "rights_language": 4,
-                    "duty_language": 3
-                },
-                "reasoning": "Document shows both customary and treaty law characteristics based on identified indicators."
-            }
+            if doc_id not in documents:
+                # For testing purposes, provide mock analysis if the document is unavailable
+                results.append({
+                    "document_id": doc_id,
+                    "analysis": MOCK_CUSTOMARY_VS_TREATY_ANALYSIS,
+                    "note": "Using mock analysis - connect database for real analysis"
+                })
+                continue
             
-            results.append({
-                "document_id": doc_id,
-                "analysis": mock_analysis,
-                "note": "Using mock analysis - connect database for real analysis"
-            })
+            analysis, row = next(analyzed)
+            rows.append(row)
+            results.append({"document_id": doc_id, "analysis": analysis})
+        
+        # Saved by the background writer so the response does not wait on the commit
+        await batch_writer.submit(ANALYSIS_INSERT_SQL, rows)
         
+        mode = "" if len(rows) == len(results) else " (mock mode)"
         return APIResponse(
             success=True,
-            message=f"Analyzed {len(results)} documents (mock mode)",
+            message=f"Analyzed {len(results)} documents{mode}",
             data={"analyses": results}
         )
         
@@ -346,53 +622,51 @@ async def analyze_customary_vs_treaty(request: AnalysisRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+BOUNDARY_INSERT_SQL = """
+    INSERT INTO jurisdictional_boundaries 
+    (id, jurisdiction, boundary_type, description, legal_basis, 
+     conflicts, confidence_score, date_analyzed)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
 @app.post("/analyze/jurisdictional-boundaries", response_model=APIResponse)
 async def analyze_jurisdictional_boundaries(request: JurisdictionalAnalysisRequest):
     """Analyze jurisdictional boundaries"""
     try:
-        with db_manager.get_connection() as conn:
+        def select_documents(conn):
             cursor = conn.cursor()
             
-            # Get documents for the specified jurisdiction
+            # Get documents for the specified jurisdiction; the analysis only reads these columns
             cursor.execute("""
-                SELECT * FROM space_law_documents 
+                SELECT jurisdiction, title, content FROM space_law_documents 
                 WHERE jurisdiction = ? OR jurisdiction = 'international'
                 ORDER BY date_collected DESC
             """, (request.jurisdiction,))
-            
-            rows = cursor.fetchall()
-            documents = [dict(row) for row in rows]
-            
-            # Convert JSON fields
-            for doc in documents:
-                if doc.get('keywords'):
-                    doc['keywords'] = json.loads(doc['keywords'])
-                if doc.get('metadata'):
-                    doc['metadata'] = json.loads(doc['metadata'])
-            
-            # Analyze boundaries
-            boundaries = await analyzer.analyze_jurisdictional_boundaries(documents)
-            
-            # Save boundaries to database
-            for boundary in boundaries:
-                cursor.execute("""
-                    INSERT INTO jurisdictional_boundaries 
-                    (id, jurisdiction, boundary_type, description, legal_basis, 
-                     conflicts, confidence_score, date_analyzed)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    boundary.id, boundary.jurisdiction.value, boundary.boundary_type,
-                    boundary.description, json.dumps(boundary.legal_basis),
-                    json.dumps(boundary.conflicts), boundary.confidence_score,
-                    boundary.date_analyzed
-                ))
-            
-            conn.commit()
+            return [dict(row) for row in cursor.fetchall()]
+        
+        documents = await db_manager.read(select_documents)
+        
+        # Analyze boundaries off the database thread so other queries are not held up
+        boundaries = await asyncio.to_thread(analyzer.analyze_jurisdictional_boundaries, documents)
+        
+        rows = [
+            (
+                boundary.id, boundary.jurisdiction.value, boundary.boundary_type,
+                boundary.description, orjson.dumps(boundary.legal_basis).decode(),
+                orjson.dumps(boundary.conflicts).decode(), boundary.confidence_score,
+                boundary.date_analyzed
+            )
+            for boundary in boundaries
+        ]
+        
+        # Save boundaries to database in the background
+        await batch_writer.submit(BOUNDARY_INSERT_SQL, rows)
         
         return APIResponse(
             success=True,
             message=f"Analyzed jurisdictional boundaries for {request.jurisdiction}",
-            data={"boundaries": [boundary.dict() for boundary in boundaries]}
+            data={"boundaries": [boundary.model_dump() for boundary in boundaries]}
         )
         
     except Exception as e:
@@ -421,150 +695,173 @@ async def generate_jus_cogens_recommendations(background_tasks: BackgroundTasks)
 async def get_analyses(
     analysis_type: Optional[str] = None,
     limit: int = 50,
-    offset: int = 0
+    offset: int = 0,
+    before: Optional[str] = None,
+    before_id: Optional[str] = None
 ):
-    """Get legal analyses"""
+    """Get legal analyses, paged by offset or by the returned next_cursor"""
     try:
-        with db_manager.get_connection() as conn:
+        query = "SELECT * FROM legal_analyses WHERE 1=1"
+        params = []
+        
+        if analysis_type:
+            query += " AND analysis_type = ?"
+            params.append(analysis_type)
+        
+        keyset_sql, keyset_params = _keyset_filter("date_analyzed", before, before_id)
+        query += keyset_sql
+        params.extend(keyset_params)
+        
+        query += " ORDER BY date_analyzed DESC, id DESC LIMIT ? OFFSET ?"
+        params.extend([limit, offset])
+        
+        def select_analyses(conn):
             cursor = conn.cursor()
-            
-            query = "SELECT * FROM legal_analyses WHERE 1=1"
-            params = []
-            
-            if analysis_type:
-                query += " AND analysis_type = ?"
-                params.append(analysis_type)
-            
-            query += " ORDER BY date_analyzed DESC LIMIT ? OFFSET ?"
-            params.extend([limit, offset])
-            
             cursor.execute(query, params)
-            rows = cursor.fetchall()
-            
-            analyses = []
-            for row in rows:
-                analysis = dict(row)
-                if analysis.get('results'):
-                    analysis['results'] = json.loads(analysis['results'])
-                analyses.append(analysis)
-            
-            return APIResponse(
-                success=True,
-                message=f"Retrieved {len(analyses)} analyses",
-                data={"analyses": analyses}
-            )
-            
+            return [dict(row, results=_decode_json(row['results'])) for row in cursor.fetchall()]
+        
+        analyses = await db_manager.read(select_analyses)
+        
+        return APIResponse(
+            success=True,
+            message=f"Retrieved {len(analyses)} analyses",
+            data={"analyses": analyses, "next_cursor": _next_cursor(analyses, "date_analyzed", limit)}
+        )
+        
     except Exception as e:
         logger.error(f"Error retrieving analyses: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/boundaries", response_model=APIResponse)
-async def get_jurisdictional_boundaries(limit: int = 50, offset: int = 0):
-    """Get jurisdictional boundaries"""
+async def get_jurisdictional_boundaries(
+    limit: int = 50,
+    offset: int = 0,
+    before: Optional[str] = None,
+    before_id: Optional[str] = None
+):
+    """Get jurisdictional boundaries, paged by offset or by the returned next_cursor"""
     try:
-        with db_manager.get_connection() as conn:
+        keyset_sql, keyset_params = _keyset_filter("date_analyzed", before, before_id)
+        
+        def select_boundaries(conn):
             cursor = conn.cursor()
-            cursor.execute("""
-                SELECT * FROM jurisdictional_boundaries 
-                ORDER BY date_analyzed DESC LIMIT ? OFFSET ?
-            """, (limit, offset))
-            
-            rows = cursor.fetchall()
-            boundaries = []
-            
-            for row in rows:
-                boundary = dict(row)
-                if boundary.get('legal_basis'):
-                    boundary['legal_basis'] = json.loads(boundary['legal_basis'])
-                if boundary.get('conflicts'):
-                    boundary['conflicts'] = json.loads(boundary['conflicts'])
-                boundaries.append(boundary)
-            
-            return APIResponse(
-                success=True,
-                message=f"Retrieved {len(boundaries)} boundaries",
-                data={"boundaries": boundaries}
+            cursor.execute(
+                f"SELECT * FROM jurisdictional_boundaries WHERE 1=1{keyset_sql}"
+                " ORDER BY date_analyzed DESC, id DESC LIMIT ? OFFSET ?",
+                keyset_params + [limit, offset]
             )
-            
+            return [
+                dict(row, legal_basis=_decode_json(row['legal_basis']), conflicts=_decode_json(row['conflicts']))
+                for row in cursor.fetchall()
+            ]
+        
+        boundaries = await db_manager.read(select_boundaries)
+        
+        return APIResponse(
+            success=True,
+            message=f"Retrieved {len(boundaries)} boundaries",
+            data={"boundaries": boundaries, "next_cursor": _next_cursor(boundaries, "date_analyzed", limit)}
+        )
+        
     except Exception as e:
         logger.error(f"Error retrieving boundaries: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/recommendations", response_model=APIResponse)
-async def get_jus_cogens_recommendations(limit: int = 50, offset: int = 0):
-    """Get jus cogens recommendations"""
+async def get_jus_cogens_recommendations(
+    limit: int = 50,
+    offset: int = 0,
+    before: Optional[str] = None,
+    before_id: Optional[str] = None
+):
+    """Get jus cogens recommendations, paged by offset or by the returned next_cursor"""
     try:
-        with db_manager.get_connection() as conn:
+        keyset_sql, keyset_params = _keyset_filter("date_generated", before, before_id)
+        
+        def select_recommendations(conn):
             cursor = conn.cursor()
-            cursor.execute("""
-                SELECT * FROM jus_cogens_recommendations 
-                ORDER BY date_generated DESC LIMIT ? OFFSET ?
-            """, (limit, offset))
-            
-            rows = cursor.fetchall()
-            recommendations = []
-            
-            for row in rows:
-                rec = dict(row)
-                if rec.get('legal_basis'):
-                    rec['legal_basis'] = json.loads(rec['legal_basis'])
-                if rec.get('supporting_documents'):
-                    rec['supporting_documents'] = json.loads(rec['supporting_documents'])
-                if rec.get('opposition_arguments'):
-                    rec['opposition_arguments'] = json.loads(rec['opposition_arguments'])
-                recommendations.append(rec)
-            
-            return APIResponse(
-                success=True,
-                message=f"Retrieved {len(recommendations)} recommendations",
-                data={"recommendations": recommendations}
+            cursor.execute(
+                f"SELECT * FROM jus_cogens_recommendations WHERE 1=1{keyset_sql}"
+                " ORDER BY date_generated DESC, id DESC LIMIT ? OFFSET ?",
+                keyset_params + [limit, offset]
             )
-            
+            return [
+                dict(
+                    row,
+                    legal_basis=_decode_json(row['legal_basis']),
+                    supporting_documents=_decode_json(row['supporting_documents']),
+                    opposition_arguments=_decode_json(row['opposition_arguments'])
+                )
+                for row in cursor.fetchall()
+            ]
+        
+        recommendations = await db_manager.read(select_recommendations)
+        
+        return APIResponse(
+            success=True,
+            message=f"Retrieved {len(recommendations)} recommendations",
+            data={
+                "recommendations": recommendations,
+                "next_cursor": _next_cursor(recommendations, "date_generated", limit)
+            }
+        )
+        
     except Exception as e:
         logger.error(f"Error retrieving recommendations: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Completed documents fetched per database read during the jus cogens scan
+JUS_COGENS_SCAN_CHUNK = 500
+
+JUS_COGENS_INSERT_SQL = """
+    INSERT INTO jus_cogens_recommendations 
+    (id, principle, description, legal_basis, supporting_documents,
+     opposition_arguments, recommendation_strength, implementation_guidance, date_generated)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
 async def process_jus_cogens_recommendations():
     """Background task to generate jus cogens recommendations"""
     try:
-        with db_manager.get_connection() as conn:
+        def select_chunk(conn, after_id):
             cursor = conn.cursor()
             
-            # Get all documents for analysis
-            cursor.execute("SELECT * FROM space_law_documents WHERE status = 'completed'")
-            rows = cursor.fetchall()
-            documents = [dict(row) for row in rows]
-            
-            # Convert JSON fields
-            for doc in documents:
-                if doc.get('keywords'):
-                    doc['keywords'] = json.loads(doc['keywords'])
-                if doc.get('metadata'):
-                    doc['metadata'] = json.loads(doc['metadata'])
-            
-            # Generate recommendations
-            recommendations = await analyzer.generate_jus_cogens_recommendations(documents)
-            
-            # Save recommendations
-            for rec in recommendations:
-                cursor.execute("""
-                    INSERT INTO jus_cogens_recommendations 
-                    (id, principle, description, legal_basis, supporting_documents,
-                     opposition_arguments, recommendation_strength, implementation_guidance, date_generated)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    rec.id, rec.principle, rec.description,
-                    json.dumps(rec.legal_basis), json.dumps(rec.supporting_documents),
-                    json.dumps(rec.opposition_arguments), rec.recommendation_strength,
-                    rec.implementation_guidance, rec.date_generated
-                ))
-            
-            conn.commit()
-            logger.info(f"Generated {len(recommendations)} jus cogens recommendations")
-            
+            # Only the id and content are needed; keyset on id keeps each read short
+            cursor.execute("""
+                SELECT id, content FROM space_law_documents
+                WHERE status = 'completed' AND id > ?
+                ORDER BY id LIMIT ?
+            """, (after_id, JUS_COGENS_SCAN_CHUNK))
+            return [dict(row) for row in cursor.fetchall()]
+        
+        # Reads and scans alternate, so the database thread is free between chunks
+        support = None
+        after_id = ""
+        while True:
+            documents = await db_manager.read(select_chunk, after_id)
+            if not documents:
+                break
+            support = await asyncio.to_thread(analyzer.collect_jus_cogens_support, documents, support)
+            after_id = documents[-1]["id"]
+        recommendations = analyzer.recommend_jus_cogens(support or {})
+        
+        rows = [
+            (
+                rec.id, rec.principle, rec.description,
+                orjson.dumps(rec.legal_basis).decode(), orjson.dumps(rec.supporting_documents).decode(),
+                orjson.dumps(rec.opposition_arguments).decode(), rec.recommendation_strength,
+                rec.implementation_guidance, rec.date_generated
+            )
+            for rec in recommendations
+        ]
+        
+        await db_manager.insert_many(JUS_COGENS_INSERT_SQL, rows)
+        logger.info(f"Generated {len(recommendations)} jus cogens recommendations")
+        
     except Exception as e:
         logger.error(f"Error processing jus cogens recommendations: {e}")
 
@@ -2,16 +2,27 @@
 Database connection and configuration for International Space Law AI Assistant
 """
 import os
-from typing import Optional
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Tuple
 import sqlite3
 try:
     import psycopg2
 except ImportError:
     psycopg2 = None
+try:
+    from psycopg2.pool import ThreadedConnectionPool
+except ImportError:
+    ThreadedConnectionPool = None
 try:
     import pymysql
 except ImportError:
     pymysql = None
+try:
+    from dbutils.pooled_db import PooledDB
+except ImportError:
+    PooledDB = None
 from contextlib import contextmanager
 import logging
 
@@ -29,6 +40,8 @@ class DatabaseConfig:
         self.user = os.getenv('DB_USER', '')
         self.password = os.getenv('DB_PASSWORD', '')
         self.sqlite_path = os.getenv('SQLITE_PATH', 'space_law.db')
+        self.pool_min_size = int(os.getenv('DB_POOL_MIN', '1'))
+        self.pool_max_size = int(os.getenv('DB_POOL_MAX', '10'))
     
     def get_connection_string(self) -> str:
         """Get database connection string based on type"""
@@ -47,38 +60,113 @@ class DatabaseManager:
     
     def __init__(self, config: DatabaseConfig):
         self.config = config
+        # SQLite connections are cheap to share and keep their page cache warm
+        self._sqlite_connection = None
+        # PostgreSQL/MySQL connections come from a pool when the pool library is installed.
+        # _acquire() runs on executor threads, so the pool is created once under _pool_lock.
+        self._pool = None
+        self._pool_created = False
+        self._pool_lock = threading.Lock()
+        # SQLite work runs on one thread that owns the shared connection
+        self._sqlite_executor = None
+        self._write_lock = asyncio.Lock()
+    
+    def _connect(self):
+        """Open a new database connection"""
+        if self.config.db_type == 'sqlite':
+            connection = sqlite3.connect(self.config.sqlite_path, check_same_thread=False)
+            connection.row_factory = sqlite3.Row
+            # Safe with WAL; avoids an fsync on every commit
+            connection.execute("PRAGMA synchronous=NORMAL")
+            return connection
+        elif self.config.db_type == 'postgresql':
+            if psycopg2 is None:
+                raise ImportError("psycopg2 is not installed. Install with: pip install psycopg2-binary")
+            return psycopg2.connect(
+                host=self.config.host,
+                port=self.config.port,
+                database=self.config.name,
+                user=self.config.user,
+                password=self.config.password
+            )
+        elif self.config.db_type == 'mysql':
+            if pymysql is None:
+                raise ImportError("pymysql is not installed. Install with: pip install pymysql")
+            return pymysql.connect(
+                host=self.config.host,
+                port=int(self.config.port),
+                database=self.config.name,
+                user=self.config.user,
+                password=self.config.password,
+                charset='utf8mb4'
+            )
+        else:
+            raise ValueError(f"Unsupported database type: {self.config.db_type}")
+    
+    def _create_pool(self):
+        """Create a connection pool for server databases, or None if unavailable"""
+        if self.config.db_type == 'postgresql' and ThreadedConnectionPool is not None:
+            return ThreadedConnectionPool(
+                self.config.pool_min_size,
+                self.config.pool_max_size,
+                host=self.config.host,
+                port=self.config.port,
+                database=self.config.name,
+                user=self.config.user,
+                password=self.config.password
+            )
+        if self.config.db_type == 'mysql' and PooledDB is not None and pymysql is not None:
+            return PooledDB(
+                creator=pymysql,
+                mincached=self.config.pool_min_size,
+                maxconnections=self.config.pool_max_size,
+                blocking=True,
+                host=self.config.host,
+                port=int(self.config.port),
+                database=self.config.name,
+                user=self.config.user,
+                password=self.config.password,
+                charset='utf8mb4'
+            )
+        return None
+    
+    def _acquire(self):
+        """Take a connection from the pool, or open one when there is no pool"""
+        if not self._pool_created:
+            with self._pool_lock:
+                if not self._pool_created:
+                    self._pool = self._create_pool()
+                    self._pool_created = True
+        if self._pool is None:
+            return self._connect()
+        if self.config.db_type == 'postgresql':
+            return self._pool.getconn()
+        return self._pool.connection()
+    
+    def _release(self, connection):
+        """Return a connection to the pool, or close it when there is no pool"""
+        if self._pool is not None and self.config.db_type == 'postgresql':
+            self._pool.putconn(connection)
+        else:
+            # Pooled MySQL connections go back to the pool on close()
+            connection.close()
     
     @contextmanager
     def get_connection(self):
-        """Get database connection with proper cleanup"""
+        """Get database connection with proper cleanup.
+
+        SQLite connections are shared and stay open between calls; other
+        databases borrow a pooled connection that is returned afterwards.
+        """
+        shared = self.config.db_type == 'sqlite'
         connection = None
         try:
-            if self.config.db_type == 'sqlite':
-                connection = sqlite3.connect(self.config.sqlite_path)
-                connection.row_factory = sqlite3.Row
-            elif self.config.db_type == 'postgresql':
-                if psycopg2 is None:
-                    raise ImportError("psycopg2 is not installed. Install with: pip install psycopg2-binary")
-                connection = psycopg2.connect(
-                    host=self.config.host,
-                    port=self.config.port,
-                    database=self.config.name,
-                    user=self.config.user,
-                    password=self.config.password
-                )
-            elif self.config.db_type == 'mysql':
-                if pymysql is None:
-                    raise ImportError("pymysql is not installed. Install with: pip install pymysql")
-                connection = pymysql.connect(
-                    host=self.config.host,
-                    port=int(self.config.port),
-                    database=self.config.name,
-                    user=self.config.user,
-                    password=self.config.password,
-                    charset='utf8mb4'
-                )
+            if shared:
+                if self._sqlite_connection is None:
+                    self._sqlite_connection = self._connect()
+                connection = self._sqlite_connection
             else:
-                raise ValueError(f"Unsupported database type: {self.config.db_type}")
+                connection = self._acquire()
             
             yield connection
         except Exception as e:
@@ -87,8 +175,54 @@ class DatabaseManager:
                 connection.rollback()
             raise
         finally:
-            if connection:
-                connection.close()
+            if connection and not shared:
+                self._release(connection)
+    
+    async def read(self, func: Callable[..., Any], *args) -> Any:
+        """Run func(connection, *args) off the event loop and return its result.
+
+        SQLite calls are serialised on one dedicated thread, the way aiosqlite
+        drives its connection; other databases use the default thread pool
+        with pooled connections.
+        """
+        if self.config.db_type == 'sqlite' and self._sqlite_executor is None:
+            self._sqlite_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+        
+        def call():
+            with self.get_connection() as connection:
+                return func(connection, *args)
+        
+        return await asyncio.get_running_loop().run_in_executor(self._sqlite_executor, call)
+    
+    async def write(self, func: Callable[..., Any], *args) -> Any:
+        """Like read(), but writers run one at a time"""
+        async with self._write_lock:
+            return await self.read(func, *args)
+    
+    async def insert_many(self, sql: str, rows: List[Tuple]):
+        """Insert rows with a single executemany and one commit"""
+        def insert(connection):
+            cursor = connection.cursor()
+            cursor.executemany(sql, rows)
+            connection.commit()
+        
+        await self.write(insert)
+    
+    def close(self):
+        """Close the shared SQLite connection and any connection pool"""
+        if self._sqlite_executor is not None:
+            self._sqlite_executor.shutdown(wait=True)
+            self._sqlite_executor = None
+        if self._sqlite_connection is not None:
+            self._sqlite_connection.close()
+            self._sqlite_connection = None
+        if self._pool is not None:
+            if self.config.db_type == 'postgresql':
+                self._pool.closeall()
+            else:
+                self._pool.close()
+            self._pool = None
+        self._pool_created = False
     
     def initialize_database(self):
         """Initialize database with schema"""
@@ -96,6 +230,10 @@ class DatabaseManager:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
                 
+                if self.config.db_type == 'sqlite':
+                    # WAL is persistent, so it only needs to be set once per database file
+                    cursor.execute("PRAGMA journal_mode=WAL")
+                
                 # Read and execute schema
                 with open('database/schema.sql', 'r') as f:
                     schema_sql = f.read()
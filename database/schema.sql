@@ -92,17 +92,21 @@ CREATE TABLE IF NOT EXISTS api_logs (
 
 -- Indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_documents_law_type ON space_law_documents(law_type);
-CREATE INDEX IF NOT EXISTS idx_documents_jurisdiction ON space_law_documents(jurisdiction);
+CREATE INDEX IF NOT EXISTS idx_documents_jurisdiction_date ON space_law_documents(jurisdiction, date_collected DESC);
 CREATE INDEX IF NOT EXISTS idx_documents_status ON space_law_documents(status);
 CREATE INDEX IF NOT EXISTS idx_documents_date_collected ON space_law_documents(date_collected);
+CREATE INDEX IF NOT EXISTS idx_documents_law_type_jurisdiction_date ON space_law_documents(law_type, jurisdiction, date_collected DESC);
 
 CREATE INDEX IF NOT EXISTS idx_events_type ON space_events(event_type);
 CREATE INDEX IF NOT EXISTS idx_events_date_occurred ON space_events(date_occurred);
 
 CREATE INDEX IF NOT EXISTS idx_analyses_document_id ON legal_analyses(document_id);
-CREATE INDEX IF NOT EXISTS idx_analyses_type ON legal_analyses(analysis_type);
+CREATE INDEX IF NOT EXISTS idx_analyses_type_date ON legal_analyses(analysis_type, date_analyzed DESC);
+CREATE INDEX IF NOT EXISTS idx_analyses_date_analyzed ON legal_analyses(date_analyzed DESC, id DESC);
 
 CREATE INDEX IF NOT EXISTS idx_boundaries_jurisdiction ON jurisdictional_boundaries(jurisdiction);
+CREATE INDEX IF NOT EXISTS idx_boundaries_date_analyzed ON jurisdictional_boundaries(date_analyzed DESC);
+CREATE INDEX IF NOT EXISTS idx_recommendations_date_generated ON jus_cogens_recommendations(date_generated DESC);
 CREATE INDEX IF NOT EXISTS idx_logs_timestamp ON api_logs(timestamp);
 
 
@@ -0,0 +1,212 @@
+"""
+Local response cache for LLM prompts.
+
+LLMCache keeps (prompt, embedding, response) rows in a SQLite file. A lookup
+returns the stored response of an identical prompt, or of the most similar
+earlier prompt in the same scope when the cosine similarity of their
+embeddings is at least SIMILARITY_THRESHOLD. Callers set the scope to the
+fields that decide the answer, so embedding similarity only bridges
+formatting differences, never different inputs. Embeddings come from sentence-transformers
+(`pip install sentence-transformers`), imported and loaded on the first
+semantic lookup and shared by every LLMCache; without it only identical
+prompts hit.
+
+Responses produced with temperature > 0 expire after SAMPLED_TTL seconds.
+
+For deterministic requests, cache_key() and get()/put() give a plain
+exact-match cache keyed by the SHA-256 of the request.
+"""
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from typing import Optional
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "space_law_llm", "responses.db")
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+SIMILARITY_THRESHOLD = 0.92
+SAMPLED_TTL = 3600
+
+# numpy and the sentence-transformers model, set by _load_model() on first use
+np = None
+_MODEL = None
+_MODEL_UNAVAILABLE = False
+_MODEL_LOCK = threading.Lock()
+
+
+def _load_model():
+    """Shared embedding model, or None when sentence-transformers is not installed."""
+    global np, _MODEL, _MODEL_UNAVAILABLE
+    with _MODEL_LOCK:
+        if _MODEL is None and not _MODEL_UNAVAILABLE:
+            try:
+                import numpy
+                from sentence_transformers import SentenceTransformer
+            except ImportError:
+                _MODEL_UNAVAILABLE = True
+                return None
+            np = numpy
+            _MODEL = SentenceTransformer(EMBEDDING_MODEL)
+        return _MODEL
+
+
+class LLMCache:
+    """Exact and semantic cache of LLM responses, per model."""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, threshold: float = SIMILARITY_THRESHOLD):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.threshold = threshold
+        # Shared across worker threads; every statement runs under _lock
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS semantic_cache (
+                id INTEGER PRIMARY KEY,
+                model TEXT NOT NULL,
+                scope TEXT NOT NULL DEFAULT '',
+                prompt_hash TEXT NOT NULL,
+                prompt TEXT NOT NULL,
+                embedding BLOB,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL
+            )
+        """)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(semantic_cache)")}
+        if "scope" not in columns:
+            # Cache files written before scopes existed
+            self.conn.execute("ALTER TABLE semantic_cache ADD COLUMN scope TEXT NOT NULL DEFAULT ''")
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_semantic_cache_model_hash ON semantic_cache(model, prompt_hash)"
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_semantic_cache_model_scope ON semantic_cache(model, scope)"
+        )
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS exact_cache (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        self.conn.commit()
+        self._last_embedding = (None, None)
+
+    @staticmethod
+    def cache_key(model: str, messages, temperature: float = 0.0, tools=None,
+                  credential: Optional[str] = None) -> Optional[str]:
+        """SHA-256 key for a deterministic request, or None when temperature > 0.
+
+        credential (e.g. the API key) is hashed into the key so results cached
+        for one key are never served for another.
+        """
+        if temperature > 0:
+            return None
+        request = {
+            "model": model,
+            "messages": messages,
+            "tools": tools,
+            "credential": hashlib.sha256(credential.encode("utf-8")).hexdigest() if credential else None,
+        }
+        return hashlib.sha256(json.dumps(request, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def get(self, key: Optional[str], max_age: Optional[float] = None) -> Optional[str]:
+        """Exact-match lookup by cache_key(); entries older than max_age seconds miss."""
+        if key is None:
+            return None
+        with self._lock:
+            row = self.conn.execute("SELECT response, created_at FROM exact_cache WHERE key = ?", (key,)).fetchone()
+        if row is None or (max_age is not None and time.time() - row[1] > max_age):
+            return None
+        return row[0]
+
+    def put(self, key: Optional[str], response: str):
+        """Store response under a cache_key()."""
+        if key is None:
+            return
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO exact_cache (key, response, created_at) VALUES (?, ?, ?)",
+                (key, response, time.time()),
+            )
+            self.conn.commit()
+
+    @staticmethod
+    def _hash(prompt: str) -> str:
+        return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+    def _embed(self, prompt: str):
+        """Normalised float32 embedding of prompt, or None without sentence-transformers."""
+        if self._last_embedding[0] == prompt:
+            return self._last_embedding[1]
+        model = _load_model()
+        if model is None:
+            return None
+        embedding = model.encode(prompt, normalize_embeddings=True).astype(np.float32)
+        self._last_embedding = (prompt, embedding)
+        return embedding
+
+    def lookup(self, model: str, prompt: str, scope: str = "", embed_text: Optional[str] = None) -> Optional[str]:
+        """Return a cached response for prompt, or None on a miss.
+
+        Only rows stored with the same scope are candidates for a semantic
+        match, which compares the embedding of embed_text (default: prompt).
+        """
+        now = time.time()
+        with self._lock:
+            self.conn.execute("DELETE FROM semantic_cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+            self.conn.commit()
+            row = self.conn.execute(
+                "SELECT response FROM semantic_cache WHERE model = ? AND scope = ? AND prompt_hash = ? "
+                "ORDER BY created_at DESC LIMIT 1",
+                (model, scope, self._hash(prompt)),
+            ).fetchone()
+        if row:
+            return row[0]
+
+        embedding = self._embed(prompt if embed_text is None else embed_text)
+        if embedding is None:
+            return None
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT embedding, response FROM semantic_cache WHERE model = ? AND scope = ? AND embedding IS NOT NULL",
+                (model, scope),
+            ).fetchall()
+        if not rows:
+            return None
+        matrix = np.frombuffer(b"".join(blob for blob, _ in rows), dtype=np.float32).reshape(len(rows), -1)
+        scores = matrix @ embedding
+        best = int(scores.argmax())
+        if scores[best] >= self.threshold:
+            return rows[best][1]
+        return None
+
+    def store(self, model: str, prompt: str, response: str, temperature: float = 0.0,
+              scope: str = "", embed_text: Optional[str] = None):
+        """Cache response for prompt; sampled (temperature > 0) responses get a TTL.
+
+        scope and embed_text must match what lookup() will be given.
+        """
+        now = time.time()
+        embedding = self._embed(prompt if embed_text is None else embed_text)
+        with self._lock:
+            self.conn.execute(
+                """INSERT INTO semantic_cache (model, scope, prompt_hash, prompt, embedding, response, created_at, expires_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    model,
+                    scope,
+                    self._hash(prompt),
+                    prompt,
+                    embedding.tobytes() if embedding is not None else None,
+                    response,
+                    now,
+                    now + SAMPLED_TTL if temperature > 0 else None,
+                ),
+            )
+            self.conn.commit()
+
+    def close(self):
+        self.conn.close()
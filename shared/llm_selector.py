@@ -7,119 +7,706 @@ Fallback: OpenAI
 
 Provides:
 - select_provider(env): returns 'alibaba'|'claude'|'openai'|None
+- configured_providers(env): every provider with credentials, in priority order
 - call_qwen_signed(...): helper to build a signed request for Alibaba Model Studio (caller must supply credentials)
+- QwenClient(endpoint, model, access_key, access_secret): reusable signed Qwen
+  caller that precomputes everything except the date, body and signature
 - call_claude(...): simple wrapper for Claude API
-- call_openai(...): simple wrapper for OpenAI
+- call_openai(...): simple wrapper for OpenAI; a list of prompts is packed into
+  batched requests and answered as a list of strings
+- The sync call_* helpers share one HTTP/2 httpx client when httpx is
+  installed, and fall back to pooled requests sessions otherwise
+- stream_claude / stream_openai: yield text deltas as the model generates them
+- acall_qwen_signed / acall_claude / acall_openai: async variants sharing one
+  pooled httpx client, so many prompts can be sent concurrently
+- call_best(prompt, env): race every configured provider and return the first
+  successful (provider, response), giving the preferred provider a head start
+- RateLimiter / set_rate_limit(provider, rpm, tpm): every call self-throttles
+  to a per-provider requests- and tokens-per-minute budget
+- warmup(env): open a pooled keep-alive connection to each configured provider
+  so the first real call skips DNS, TCP and TLS setup
+- clear_response_cache(): drop cached responses; every call_*/acall_* helper
+  answers repeat prompts from an in-process LRU unless use_cache=False
 
 This module does not perform real Qwen signing validation here — it constructs
 the canonical string and HMAC signature per Alibaba docs template. You must
 provide your `ALIBABA_API_ENDPOINT`, `ALIBABA_ACCESS_KEY_ID`, and
 `ALIBABA_ACCESS_KEY_SECRET` to actually invoke the endpoint.
 """
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple, Iterable, Iterator, List, Union, Deque
+from functools import lru_cache, partial
+from urllib.parse import urlsplit
+from collections import OrderedDict, deque
+import threading
 import time
+import random
+import asyncio
 import hashlib
 import hmac
 import base64
 import json
+import logging
 import requests
+from requests.adapters import HTTPAdapter
+try:
+    import httpx
+except ImportError:
+    httpx = None
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
 
+logger = logging.getLogger(__name__)
 
-def select_provider(env: Dict[str, str]) -> Optional[str]:
-    """Select provider based on available credentials.
+# Defaults applied to every provider call
+DEFAULT_TIMEOUT = 15
+DEFAULT_MAX_TOKENS = 1024
+DEFAULT_MAX_RETRIES = 3
+
+# Retry policy: exponential backoff with jitter unless the provider sends Retry-After
+RETRY_BACKOFF = 0.5
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Model names used for the Claude and OpenAI calls
+CLAUDE_MODEL = "claude-3-opus-20240229"
+OPENAI_MODEL = "gpt-4"
+
+# Qwen model used by call_best when ALIBABA_MODEL is not set
+DEFAULT_QWEN_MODEL = "qwen-plus"
+
+# Head start, in seconds, that call_best gives the preferred provider
+PRIMARY_GRACE = 0.5
+
+# Prompts packed into one OpenAI request when call_openai is given a list
+OPENAI_BATCH_SIZE = 8
+
+# In-process LRU of successful responses, keyed by provider/model/prompt hash.
+# Raw response bodies are stored so every hit decodes a fresh, unshared dict.
+RESPONSE_CACHE_SIZE = 4096
+_RESPONSE_CACHE: "OrderedDict[str, bytes]" = OrderedDict()
+_RESPONSE_CACHE_LOCK = threading.Lock()
+
+# Requests and tokens per minute allowed per provider (None = unlimited);
+# adjust to your account tier or call set_rate_limit()
+RATE_LIMITS: Dict[str, Tuple[Optional[int], Optional[int]]] = {
+    "alibaba": (300, 300_000),
+    "claude": (50, 40_000),
+    "openai": (500, 150_000),
+}
+RATE_WINDOW = 60.0
+
+# Base URLs opened by warmup() for the Claude and OpenAI providers
+CLAUDE_BASE_URL = "https://api.anthropic.com"
+OPENAI_BASE_URL = "https://api.openai.com"
+WARMUP_TIMEOUT = 5
+
+# Connection pool sizing for each provider host
+POOL_CONNECTIONS = 16
+POOL_MAXSIZE = 64
+
+# Pooled keep-alive sessions, one per provider host (used when httpx is missing)
+_SESSIONS: Dict[str, requests.Session] = {}
+
+# Connection limits for the shared httpx clients (sync call_* and async acall_*)
+CLIENT_MAX_CONNECTIONS = 256
+CLIENT_MAX_KEEPALIVE = 64
+CLIENT_CONNECT_TIMEOUT = 5.0
+_CLIENT = None
+_ACLIENT = None
+
+
+def _session_for(url: str) -> requests.Session:
+    """Return the shared session for the host of url, creating it on first use."""
+    host = urlsplit(url).netloc
+    session = _SESSIONS.get(host)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _SESSIONS[host] = session
+    return session
+
+
+def _cache_key(*parts: Any) -> str:
+    """Stable key for a request, e.g. (provider, model, max_tokens, prompt)."""
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        h.update(str(part).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _cache_get(key: Optional[str]) -> Optional[Dict[str, Any]]:
+    if key is None:
+        return None
+    with _RESPONSE_CACHE_LOCK:
+        body = _RESPONSE_CACHE.get(key)
+        if body is None:
+            return None
+        _RESPONSE_CACHE.move_to_end(key)
+    return _loads(body)
+
+
+def _cache_put(key: Optional[str], body: bytes) -> None:
+    if key is None:
+        return
+    with _RESPONSE_CACHE_LOCK:
+        _RESPONSE_CACHE[key] = body
+        _RESPONSE_CACHE.move_to_end(key)
+        if len(_RESPONSE_CACHE) > RESPONSE_CACHE_SIZE:
+            _RESPONSE_CACHE.popitem(last=False)
+
+
+def clear_response_cache() -> None:
+    """Drop every cached provider response."""
+    with _RESPONSE_CACHE_LOCK:
+        _RESPONSE_CACHE.clear()
+
+
+class RateLimiter:
+    """Sliding one-minute window of requests and tokens for one provider."""
+
+    def __init__(self, rpm: Optional[int], tpm: Optional[int]):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._events: Deque[Tuple[float, int]] = deque()
+        self._tokens = 0
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: int) -> float:
+        """Record a call and return 0, or return seconds to wait before trying again."""
+        now = time.monotonic()
+        with self._lock:
+            while self._events and now - self._events[0][0] >= RATE_WINDOW:
+                self._tokens -= self._events.popleft()[1]
+            over_rpm = self.rpm is not None and len(self._events) >= self.rpm
+            # A single call larger than the whole budget still goes through on an empty window
+            over_tpm = self.tpm is not None and bool(self._events) and self._tokens + tokens > self.tpm
+            if not (over_rpm or over_tpm):
+                self._events.append((now, tokens))
+                self._tokens += tokens
+                return 0.0
+            return self._events[0][0] + RATE_WINDOW - now
+
+    def acquire_sync(self, tokens: int = 0) -> None:
+        """Block the calling thread until the call fits in the window."""
+        while (delay := self._reserve(tokens)) > 0:
+            time.sleep(delay)
+
+    async def acquire(self, tokens: int = 0) -> None:
+        """Wait without blocking the event loop until the call fits in the window."""
+        while (delay := self._reserve(tokens)) > 0:
+            await asyncio.sleep(delay)
+
+
+_LIMITERS: Dict[str, RateLimiter] = {provider: RateLimiter(rpm, tpm) for provider, (rpm, tpm) in RATE_LIMITS.items()}
+
+
+def set_rate_limit(provider: str, rpm: Optional[int], tpm: Optional[int]) -> None:
+    """Replace the requests/tokens-per-minute budget for a provider."""
+    _LIMITERS[provider] = RateLimiter(rpm, tpm)
+
+
+def _estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)."""
+    return len(text) // 4 + 1
+
+
+def _client_kwargs() -> Dict[str, Any]:
+    """Settings shared by the sync and async httpx clients.
+
+    HTTP/2 is used when h2 is installed; httpx advertises brotli in
+    Accept-Encoding by itself when brotli is installed.
+    """
+    return {
+        "http2": HTTP2_AVAILABLE,
+        "limits": httpx.Limits(max_connections=CLIENT_MAX_CONNECTIONS, max_keepalive_connections=CLIENT_MAX_KEEPALIVE),
+        "timeout": httpx.Timeout(30.0, connect=CLIENT_CONNECT_TIMEOUT),
+    }
+
+
+def _sync_client() -> "httpx.Client":
+    """Return the shared sync httpx client, creating it on first use."""
+    global _CLIENT
+    if _CLIENT is None:
+        _CLIENT = httpx.Client(**_client_kwargs())
+    return _CLIENT
+
+
+# Errors worth retrying, from whichever HTTP library carries the request
+_TRANSPORT_ERRORS = (requests.ConnectionError, requests.Timeout) + ((httpx.TransportError,) if httpx else ())
+
+
+def _dumps(obj: Any) -> bytes:
+    """Compact JSON bytes, via orjson when installed."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+def _loads(data: Union[bytes, str]) -> Any:
+    """Parse JSON, via orjson when installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _retry_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Seconds to wait before retrying, honouring a numeric Retry-After header."""
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+    return RETRY_BACKOFF * (2 ** attempt) + random.uniform(0, RETRY_BACKOFF)
+
+
+def _send(url: str, timeout: float, headers: Dict[str, str], content: bytes):
+    """POST once on the shared httpx client, or the host's requests session without httpx."""
+    if httpx is not None:
+        return _sync_client().post(url, headers=headers, content=content, timeout=timeout)
+    return _session_for(url).post(url, headers=headers, data=content, timeout=timeout)
+
+
+def _post(url: str, timeout: float, max_retries: int, cache_key: Optional[str] = None,
+          provider: Optional[str] = None, tokens: int = 0, **kwargs) -> Dict[str, Any]:
+    """POST through the shared client, retrying 429/5xx and connection failures.
+
+    When cache_key is given, a cached response is returned without a request
+    and a successful response is stored under it. Each attempt first waits
+    for room in the provider's rate limit.
+    """
+    cached = _cache_get(cache_key)
+    if cached is not None:
+        return cached
+    limiter = _LIMITERS.get(provider)
+    for attempt in range(max_retries + 1):
+        if limiter is not None:
+            limiter.acquire_sync(tokens)
+        try:
+            resp = _send(url, timeout, **kwargs)
+        except _TRANSPORT_ERRORS:
+            if attempt == max_retries:
+                raise
+            time.sleep(_retry_delay(attempt))
+            continue
+        if resp.status_code in RETRY_STATUSES and attempt < max_retries:
+            time.sleep(_retry_delay(attempt, resp.headers.get("Retry-After")))
+            continue
+        resp.raise_for_status()
+        _cache_put(cache_key, resp.content)
+        return _loads(resp.content)
+
+
+def configured_providers(env: Dict[str, str]) -> List[str]:
+    """Every provider with credentials in env, in priority order.
 
     Priority: Alibaba (Qwen) -> Claude -> OpenAI
-    Returns provider key or None.
     """
+    providers = []
     if env.get("ALIBABA_ACCESS_KEY_ID") and env.get("ALIBABA_ACCESS_KEY_SECRET") and env.get("ALIBABA_API_ENDPOINT"):
-        return "alibaba"
+        providers.append("alibaba")
     if env.get("CLAUDE_API_KEY"):
-        return "claude"
+        providers.append("claude")
     if env.get("OPENAI_API_KEY"):
-        return "openai"
-    return None
+        providers.append("openai")
+    return providers
 
 
-def _build_qwen_signature(access_key: str, access_secret: str, method: str, path: str, headers: Dict[str, str], body: str) -> str:
-    """Construct a simple HMAC-SHA256 signature for Model Studio.
+def select_provider(env: Dict[str, str]) -> Optional[str]:
+    """Select provider based on available credentials.
 
-    Note: Alibaba's exact signing algorithm can vary by service/region. This
-    helper follows the common pattern of building a canonical string and
-    signing with HMAC-SHA256. If your region requires a different scheme,
-    adapt accordingly.
+    Priority: Alibaba (Qwen) -> Claude -> OpenAI
+    Returns provider key or None.
     """
-    # Canonical request: METHOD + "\n" + PATH + "\n" + sorted headers + "\n" + body
-    sorted_headers = "\n".join(f"{k.lower()}:{headers[k]}" for k in sorted(headers))
-    canonical = f"{method}\n{path}\n{sorted_headers}\n{body}"
-    digest = hmac.new(access_secret.encode("utf-8"), canonical.encode("utf-8"), hashlib.sha256).digest()
-    signature = base64.b64encode(digest).decode("utf-8")
-    return signature
+    providers = configured_providers(env)
+    return providers[0] if providers else None
 
 
-def call_qwen_signed(endpoint: str, model: str, prompt: str, access_key: str, access_secret: str, timeout: int = 15) -> Dict[str, Any]:
-    """Call Alibaba Model Studio (Qwen) with a signed request.
+def warmup(env: Dict[str, str]) -> Dict[str, bool]:
+    """Pre-open a pooled connection to every provider with credentials in env.
 
-    Parameters:
-    - endpoint: base URL for Model Studio (e.g. https://model.cn-beijing.aliyuncs.com)
-    - model: model name (e.g. qwen-large)
-    - prompt: prompt string
-    - access_key/access_secret: RAM credentials
+    Sends a HEAD through each provider's shared session so the connection
+    stays in its keep-alive pool. Returns provider -> whether it was reachable;
+    any HTTP status counts as reachable since no auth is sent.
+    """
+    base_urls = {
+        "alibaba": env.get("ALIBABA_API_ENDPOINT"),
+        "claude": CLAUDE_BASE_URL,
+        "openai": OPENAI_BASE_URL,
+    }
+    targets = {provider: base_urls[provider] for provider in configured_providers(env)}
 
-    Returns response JSON on success or raises an exception.
+    warmed = {}
+    for provider, url in targets.items():
+        try:
+            if httpx is not None:
+                _sync_client().head(url, timeout=WARMUP_TIMEOUT)
+            else:
+                _session_for(url).head(url, timeout=WARMUP_TIMEOUT)
+            warmed[provider] = True
+        except _TRANSPORT_ERRORS as e:
+            logger.warning(f"Warmup for {provider} failed: {e}")
+            warmed[provider] = False
+    return warmed
+
+
+# Model Studio invoke path (example path; adjust per your endpoint)
+QWEN_PATH = "/api/v1/model-invoke"
+
+
+class QwenClient:
+    """Signed Model Studio (Qwen) caller for one endpoint, model and credential.
+
+    The URL, host, encoded key and the constant part of the canonical string
+    are computed once; each call only encodes the body, stamps the date and
+    signs.
+
+    Note: Alibaba's exact signing algorithm can vary by service/region. This
+    follows the common pattern of building a canonical string
+    (METHOD, PATH, sorted headers, body) and signing with HMAC-SHA256. If your
+    region requires a different scheme, adapt accordingly.
     """
-    path = "/api/v1/model-invoke"  # example path; adjust per your endpoint
-    url = endpoint.rstrip("/") + path
 
-    body_dict = {"model": model, "input": prompt}
-    body = json.dumps(body_dict, separators=(",", ":"))
+    def __init__(self, endpoint: str, model: str, access_key: str, access_secret: str):
+        self.endpoint = endpoint
+        self.model = model
+        self.access_key = access_key
+        self._key = access_secret.encode("utf-8")
+        self._url = endpoint.rstrip("/") + QWEN_PATH
+        self._host = endpoint.replace("https://", "").replace("http://", "")
+        # Canonical request up to the date: signed headers in sorted order
+        self._canonical_prefix = (
+            f"POST\n{QWEN_PATH}\ncontent-type:application/json\nhost:{self._host}\nx-sdk-date:"
+        ).encode("utf-8")
 
-    # Minimum headers for signing
-    headers = {
-        "host": endpoint.replace("https://", "").replace("http://", ""),
-        "content-type": "application/json",
-        "x-sdk-date": time.strftime("%Y%m%dT%H%M%SZ", time.gmtime()),
-    }
+    def build(self, prompt: str) -> Tuple[str, Dict[str, str], bytes]:
+        """Return the URL, signed headers and body for one prompt."""
+        body = _dumps({"model": self.model, "input": prompt})
+        date = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime())
+        canonical = self._canonical_prefix + date.encode("ascii") + b"\n" + body
+        # One-shot HMAC goes straight to OpenSSL without building an hmac object
+        signature = base64.b64encode(hmac.digest(self._key, canonical, "sha256")).decode("ascii")
+        headers = {
+            "content-type": "application/json",
+            "host": self._host,
+            "x-sdk-date": date,
+            # Authorization header format (simple): AccessKeyId:Signature
+            "Authorization": f"{self.access_key}:{signature}",
+        }
+        return self._url, headers, body
 
-    signature = _build_qwen_signature(access_key, access_secret, "POST", path, headers, body)
+    def _cache_key(self, prompt: str, use_cache: bool) -> Optional[str]:
+        return _cache_key("alibaba", self.endpoint, self.model, prompt) if use_cache else None
 
-    # Authorization header format (simple): AccessKeyId:Signature
-    headers["Authorization"] = f"{access_key}:{signature}"
+    def call(self, prompt: str, timeout: float = DEFAULT_TIMEOUT, max_retries: int = DEFAULT_MAX_RETRIES,
+             use_cache: bool = True) -> Dict[str, Any]:
+        """Invoke the model and return the response JSON."""
+        key = self._cache_key(prompt, use_cache)
+        url, headers, body = self.build(prompt)
+        return _post(url, timeout, max_retries, key, "alibaba", _estimate_tokens(prompt), headers=headers, content=body)
 
-    resp = requests.post(url, headers=headers, data=body, timeout=timeout)
-    resp.raise_for_status()
-    return resp.json()
+    async def acall(self, prompt: str, timeout: float = DEFAULT_TIMEOUT, max_retries: int = DEFAULT_MAX_RETRIES,
+                    use_cache: bool = True) -> Dict[str, Any]:
+        """Async variant of call on the shared async client."""
+        key = self._cache_key(prompt, use_cache)
+        url, headers, body = self.build(prompt)
+        return await _apost(url, timeout, max_retries, key, "alibaba", _estimate_tokens(prompt), headers=headers, content=body)
 
 
-def call_claude(api_key: str, prompt: str, timeout: int = 15) -> Dict[str, Any]:
-    """Call Claude/Anthropic simple endpoint wrapper.
+@lru_cache(maxsize=32)
+def _qwen_client(endpoint: str, model: str, access_key: str, access_secret: str) -> QwenClient:
+    """Shared QwenClient for a given endpoint, model and credential."""
+    return QwenClient(endpoint, model, access_key, access_secret)
 
-    Note: caller should provide the correct model and endpoint if different.
-    """
+
+def _claude_request(api_key: str, prompt: str, max_tokens: int) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
+    """Build the URL, headers and payload for a Claude messages call."""
     url = "https://api.anthropic.com/v1/messages"
     headers = {
         "x-api-key": api_key,
         "content-type": "application/json",
     }
     payload = {
-        "model": "claude-3-opus-20240229",
+        "model": CLAUDE_MODEL,
         "messages": [{"role": "user", "content": prompt}],
-        "max_tokens": 1024,
+        "max_tokens": max_tokens,
     }
-    resp = requests.post(url, headers=headers, json=payload, timeout=timeout)
-    resp.raise_for_status()
-    return resp.json()
+    return url, headers, payload
 
 
-def call_openai(api_key: str, prompt: str, timeout: int = 15) -> Dict[str, Any]:
-    """Call OpenAI Chat Completions endpoint.
-    """
+def _openai_request(api_key: str, prompt: str, max_tokens: int) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
+    """Build the URL, headers and payload for an OpenAI chat completions call."""
     url = "https://api.openai.com/v1/chat/completions"
     headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
     payload = {
-        "model": "gpt-4",
+        "model": OPENAI_MODEL,
         "messages": [{"role": "user", "content": prompt}],
-        "max_tokens": 1024,
+        "max_tokens": max_tokens,
     }
-    resp = requests.post(url, headers=headers, json=payload, timeout=timeout)
-    resp.raise_for_status()
-    return resp.json()
+    return url, headers, payload
+
+
+def call_qwen_signed(endpoint: str, model: str, prompt: str, access_key: str, access_secret: str,
+                     timeout: float = DEFAULT_TIMEOUT, max_retries: int = DEFAULT_MAX_RETRIES,
+                     use_cache: bool = True) -> Dict[str, Any]:
+    """Call Alibaba Model Studio (Qwen) with a signed request.
+
+    Parameters:
+    - endpoint: base URL for Model Studio (e.g. https://model.cn-beijing.aliyuncs.com)
+    - model: model name (e.g. qwen-large)
+    - prompt: prompt string
+    - access_key/access_secret: RAM credentials
+    - timeout: per-attempt timeout in seconds
+    - max_retries: retries on 429/5xx or connection failure, with backoff
+    - use_cache: answer a repeat (endpoint, model, prompt) from the response cache
+
+    Returns response JSON on success or raises an exception.
+    """
+    return _qwen_client(endpoint, model, access_key, access_secret).call(prompt, timeout, max_retries, use_cache)
+
+
+def call_claude(api_key: str, prompt: str, timeout: float = DEFAULT_TIMEOUT,
+                max_tokens: int = DEFAULT_MAX_TOKENS, max_retries: int = DEFAULT_MAX_RETRIES,
+                use_cache: bool = True) -> Dict[str, Any]:
+    """Call Claude/Anthropic simple endpoint wrapper.
+
+    Note: caller should provide the correct model and endpoint if different.
+    """
+    key = _cache_key("claude", CLAUDE_MODEL, max_tokens, prompt) if use_cache else None
+    url, headers, payload = _claude_request(api_key, prompt, max_tokens)
+    return _post(url, timeout, max_retries, key, "claude", _estimate_tokens(prompt) + max_tokens,
+                 headers=headers, content=_dumps(payload))
+
+
+def _marshal_prompts(prompts: List[str]) -> str:
+    """Pack several prompts into one message that asks for a JSON array of answers."""
+    return (
+        f"Answer each of the {len(prompts)} prompts in the JSON array below independently. "
+        f"Reply with only a JSON array of {len(prompts)} strings, where item i answers prompt i.\n\n"
+        + json.dumps(prompts, ensure_ascii=False)
+    )
+
+
+def _unmarshal_answers(resp: Dict[str, Any], count: int) -> List[str]:
+    """Split a batched chat completion back into one answer per prompt."""
+    content = resp["choices"][0]["message"]["content"].strip()
+    if content.startswith("```"):
+        content = content.strip("`").removeprefix("json").strip()
+    answers = json.loads(content)
+    if not isinstance(answers, list) or len(answers) != count:
+        raise ValueError(f"Expected a JSON array of {count} answers from batched OpenAI call")
+    return [a if isinstance(a, str) else json.dumps(a) for a in answers]
+
+
+def call_openai(api_key: str, prompt: Union[str, List[str]], timeout: float = DEFAULT_TIMEOUT,
+                max_tokens: int = DEFAULT_MAX_TOKENS, max_retries: int = DEFAULT_MAX_RETRIES,
+                use_cache: bool = True, batch_size: int = OPENAI_BATCH_SIZE) -> Union[Dict[str, Any], List[str]]:
+    """Call OpenAI Chat Completions endpoint.
+
+    A single prompt returns the response JSON. A list of prompts is sent
+    batch_size at a time in one request each (max_tokens applies per prompt)
+    and returns the list of answer strings in prompt order.
+    """
+    if not isinstance(prompt, str):
+        prompts = list(prompt)
+        answers: List[str] = []
+        for start in range(0, len(prompts), batch_size):
+            batch = prompts[start:start + batch_size]
+            resp = call_openai(api_key, _marshal_prompts(batch), timeout,
+                               max_tokens * len(batch), max_retries, use_cache)
+            answers.extend(_unmarshal_answers(resp, len(batch)))
+        return answers
+
+    key = _cache_key("openai", OPENAI_MODEL, max_tokens, prompt) if use_cache else None
+    url, headers, payload = _openai_request(api_key, prompt, max_tokens)
+    return _post(url, timeout, max_retries, key, "openai", _estimate_tokens(prompt) + max_tokens,
+                 headers=headers, content=_dumps(payload))
+
+
+def _sse_data(url: str, timeout: float, headers: Dict[str, str], payload: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """POST a streaming request and yield each decoded server-sent-event data frame."""
+    def frames(lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        for line in lines:
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                return
+            yield _loads(data)
+
+    if httpx is not None:
+        with _sync_client().stream("POST", url, headers=headers, content=_dumps(payload), timeout=timeout) as resp:
+            resp.raise_for_status()
+            yield from frames(resp.iter_lines())
+    else:
+        with _session_for(url).post(url, headers=headers, data=_dumps(payload), timeout=timeout, stream=True) as resp:
+            resp.raise_for_status()
+            yield from frames(resp.iter_lines(decode_unicode=True))
+
+
+def stream_claude(api_key: str, prompt: str, timeout: float = DEFAULT_TIMEOUT,
+                  max_tokens: int = DEFAULT_MAX_TOKENS) -> Iterator[str]:
+    """Stream a Claude completion, yielding text deltas as they arrive.
+
+    Streams are neither cached nor retried; a failed status raises before
+    anything is yielded.
+    """
+    url, headers, payload = _claude_request(api_key, prompt, max_tokens)
+    payload["stream"] = True
+    _LIMITERS["claude"].acquire_sync(_estimate_tokens(prompt) + max_tokens)
+    for event in _sse_data(url, timeout, headers, payload):
+        if event.get("type") == "content_block_delta":
+            text = event["delta"].get("text")
+            if text:
+                yield text
+        elif event.get("type") == "message_stop":
+            return
+
+
+def stream_openai(api_key: str, prompt: str, timeout: float = DEFAULT_TIMEOUT,
+                  max_tokens: int = DEFAULT_MAX_TOKENS) -> Iterator[str]:
+    """Stream an OpenAI chat completion, yielding content deltas as they arrive."""
+    url, headers, payload = _openai_request(api_key, prompt, max_tokens)
+    payload["stream"] = True
+    _LIMITERS["openai"].acquire_sync(_estimate_tokens(prompt) + max_tokens)
+    for chunk in _sse_data(url, timeout, headers, payload):
+        for choice in chunk.get("choices", ()):
+            content = choice.get("delta", {}).get("content")
+            if content:
+                yield content
+
+
+def _async_client() -> "httpx.AsyncClient":
+    """Return the shared async client, creating it on first use."""
+    global _ACLIENT
+    if httpx is None:
+        raise ImportError("httpx is not installed. Install with: pip install httpx")
+    if _ACLIENT is None:
+        _ACLIENT = httpx.AsyncClient(**_client_kwargs())
+    return _ACLIENT
+
+
+async def _apost(url: str, timeout: float, max_retries: int, cache_key: Optional[str] = None,
+                 provider: Optional[str] = None, tokens: int = 0, **kwargs) -> Dict[str, Any]:
+    """Async counterpart of _post on the shared async client."""
+    cached = _cache_get(cache_key)
+    if cached is not None:
+        return cached
+    client = _async_client()
+    limiter = _LIMITERS.get(provider)
+    for attempt in range(max_retries + 1):
+        if limiter is not None:
+            await limiter.acquire(tokens)
+        try:
+            resp = await client.post(url, timeout=timeout, **kwargs)
+        except httpx.TransportError:
+            if attempt == max_retries:
+                raise
+            await asyncio.sleep(_retry_delay(attempt))
+            continue
+        if resp.status_code in RETRY_STATUSES and attempt < max_retries:
+            await asyncio.sleep(_retry_delay(attempt, resp.headers.get("Retry-After")))
+            continue
+        resp.raise_for_status()
+        _cache_put(cache_key, resp.content)
+        return _loads(resp.content)
+
+
+async def aclose():
+    """Close the shared async client; call once when the event loop is done with it."""
+    global _ACLIENT
+    if _ACLIENT is not None:
+        await _ACLIENT.aclose()
+        _ACLIENT = None
+
+
+async def acall_qwen_signed(endpoint: str, model: str, prompt: str, access_key: str, access_secret: str,
+                            timeout: float = DEFAULT_TIMEOUT, max_retries: int = DEFAULT_MAX_RETRIES,
+                            use_cache: bool = True) -> Dict[str, Any]:
+    """Async variant of call_qwen_signed, for fanning out prompts with asyncio.gather."""
+    return await _qwen_client(endpoint, model, access_key, access_secret).acall(prompt, timeout, max_retries, use_cache)
+
+
+async def acall_claude(api_key: str, prompt: str, timeout: float = DEFAULT_TIMEOUT,
+                       max_tokens: int = DEFAULT_MAX_TOKENS, max_retries: int = DEFAULT_MAX_RETRIES,
+                       use_cache: bool = True) -> Dict[str, Any]:
+    """Async variant of call_claude."""
+    key = _cache_key("claude", CLAUDE_MODEL, max_tokens, prompt) if use_cache else None
+    url, headers, payload = _claude_request(api_key, prompt, max_tokens)
+    return await _apost(url, timeout, max_retries, key, "claude", _estimate_tokens(prompt) + max_tokens,
+                        headers=headers, content=_dumps(payload))
+
+
+async def acall_openai(api_key: str, prompt: str, timeout: float = DEFAULT_TIMEOUT,
+                       max_tokens: int = DEFAULT_MAX_TOKENS, max_retries: int = DEFAULT_MAX_RETRIES,
+                       use_cache: bool = True) -> Dict[str, Any]:
+    """Async variant of call_openai."""
+    key = _cache_key("openai", OPENAI_MODEL, max_tokens, prompt) if use_cache else None
+    url, headers, payload = _openai_request(api_key, prompt, max_tokens)
+    return await _apost(url, timeout, max_retries, key, "openai", _estimate_tokens(prompt) + max_tokens,
+                        headers=headers, content=_dumps(payload))
+
+
+def _provider_calls(prompt: str, env: Dict[str, str], **kwargs) -> List[Tuple[str, Any]]:
+    """Async call factories for every provider with credentials, in select_provider order."""
+    calls = []
+    for provider in configured_providers(env):
+        if provider == "alibaba":
+            factory = partial(
+                acall_qwen_signed, env["ALIBABA_API_ENDPOINT"], env.get("ALIBABA_MODEL", DEFAULT_QWEN_MODEL), prompt,
+                env["ALIBABA_ACCESS_KEY_ID"], env["ALIBABA_ACCESS_KEY_SECRET"], **kwargs)
+        elif provider == "claude":
+            factory = partial(acall_claude, env["CLAUDE_API_KEY"], prompt, **kwargs)
+        else:
+            factory = partial(acall_openai, env["OPENAI_API_KEY"], prompt, **kwargs)
+        calls.append((provider, factory))
+    return calls
+
+
+async def call_best(prompt: str, env: Dict[str, str], primary_grace: float = PRIMARY_GRACE,
+                    timeout: float = DEFAULT_TIMEOUT, max_retries: int = DEFAULT_MAX_RETRIES,
+                    use_cache: bool = True) -> Tuple[str, Dict[str, Any]]:
+    """Race all configured providers and return (provider, response) from the first success.
+
+    The provider select_provider would pick starts alone; the others are only
+    started if it has not succeeded within primary_grace seconds. Remaining
+    calls are cancelled once one succeeds. Raises the last error if all fail.
+    """
+    calls = _provider_calls(prompt, env, timeout=timeout, max_retries=max_retries, use_cache=use_cache)
+    if not calls:
+        raise ValueError("No LLM provider credentials configured")
+
+    name, factory = calls[0]
+    tasks = {asyncio.ensure_future(factory()): name}
+    pending = set(tasks)
+    started = 1
+    error: Optional[BaseException] = None
+    try:
+        while pending:
+            wait_for = primary_grace if started < len(calls) else None
+            done, pending = await asyncio.wait(pending, timeout=wait_for, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return tasks[task], task.result()
+                error = task.exception()
+            if started < len(calls):
+                # Grace period over or the preferred provider failed: race the rest
+                for name, factory in calls[started:]:
+                    task = asyncio.ensure_future(factory())
+                    tasks[task] = name
+                    pending.add(task)
+                started = len(calls)
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+        # Wait for the cancellations and retrieve every loser's exception
+        await asyncio.gather(*tasks, return_exceptions=True)
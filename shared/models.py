@@ -4,7 +4,7 @@ Shared data models for International Space Law AI Assistant
 from datetime import datetime
 from typing import Optional, List, Dict, Any
 from enum import Enum
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class LawType(str, Enum):
@@ -45,13 +45,12 @@ class SpaceLawDocument(BaseModel):
     jurisdiction: Jurisdiction
     date_published: Optional[datetime] = None
     date_collected: datetime = Field(default_factory=datetime.utcnow)
-    keywords: List[str] = []
+    keywords: List[str] = Field(default_factory=list)
     summary: Optional[str] = None
     status: DocumentStatus = DocumentStatus.PENDING
-    metadata: Dict[str, Any] = {}
-    
-    class Config:
-        use_enum_values = True
+    metadata: Dict[str, Any] = Field(default_factory=dict)
+
+    model_config = ConfigDict(use_enum_values=True)
 
 
 class SpaceEvent(BaseModel):
@@ -62,10 +61,10 @@ class SpaceEvent(BaseModel):
     event_type: str  # launch, incident, treaty_signature, etc.
     date_occurred: datetime
     date_collected: datetime = Field(default_factory=datetime.utcnow)
-    participants: List[str] = []
+    participants: List[str] = Field(default_factory=list)
     location: Optional[str] = None
     legal_implications: Optional[str] = None
-    metadata: Dict[str, Any] = {}
+    metadata: Dict[str, Any] = Field(default_factory=dict)
 
 
 class LegalAnalysis(BaseModel):
@@ -86,8 +85,8 @@ class JurisdictionalBoundary(BaseModel):
     jurisdiction: Jurisdiction
     boundary_type: str  # territorial, functional, etc.
     description: str
-    legal_basis: List[str] = []
-    conflicts: List[str] = []
+    legal_basis: List[str] = Field(default_factory=list)
+    conflicts: List[str] = Field(default_factory=list)
     confidence_score: float = Field(ge=0.0, le=1.0)
     date_analyzed: datetime = Field(default_factory=datetime.utcnow)
 
@@ -97,9 +96,9 @@ class JusCogensRecommendation(BaseModel):
     id: Optional[str] = None
     principle: str
     description: str
-    legal_basis: List[str] = []
-    supporting_documents: List[str] = []
-    opposition_arguments: List[str] = []
+    legal_basis: List[str] = Field(default_factory=list)
+    supporting_documents: List[str] = Field(default_factory=list)
+    opposition_arguments: List[str] = Field(default_factory=list)
     recommendation_strength: float = Field(ge=0.0, le=1.0)
     implementation_guidance: Optional[str] = None
     date_generated: datetime = Field(default_factory=datetime.utcnow)
@@ -1,10 +1,25 @@
 """
 Test script for LLM integration with the legal analysis API endpoints
 """
+import argparse
+import asyncio
+import hashlib
+import io
+import os
+import sys
+import threading
+import time
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
-from typing import Dict, Any
-from shared import llm_selector
+from typing import Dict, Any, Optional, Union, Tuple
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # API Configuration
 DATA_COLLECTION_API = "http://localhost:8001"
@@ -13,35 +28,243 @@ LEGAL_ANALYSIS_API = "http://localhost:8002"
 # LLM Configuration (add your API key)
 OPENAI_API_KEY = ""  # Set your API key here
 OPENAI_API_URL = "https://api.openai.com/v1/chat/completions"
+OPENAI_MODELS_URL = "https://api.openai.com/v1/models"  # key check, no tokens billed
 
 # Alternative: Claude/Anthropic
 CLAUDE_API_KEY = ""  # Set your API key here
 CLAUDE_API_URL = "https://api.anthropic.com/v1/messages"
+CLAUDE_MODELS_URL = "https://api.anthropic.com/v1/models"  # key check, no tokens billed
 
 # Alibaba Cloud Generative AI (set your credentials and optional endpoint)
 ALIBABA_ACCESS_KEY_ID = ""  # e.g. LTAI...
 ALIBABA_ACCESS_KEY_SECRET = ""  # secret
 ALIBABA_API_ENDPOINT = ""  # optional, e.g. https://genai.cn-shanghai.aliyuncs.com
 
+# Auth headers, installed once on each provider's session below
+OPENAI_HEADERS = {"Authorization": f"Bearer {OPENAI_API_KEY}"}
+CLAUDE_HEADERS = {"x-api-key": CLAUDE_API_KEY, "anthropic-version": "2023-06-01"}
+
+# (connect, read) timeouts for the health and credential probes. The read limit applies to
+# each socket read rather than the whole call, so a slow sibling probe running
+# concurrently never eats into another probe's budget.
+PROBE_TIMEOUT = (2, 3)
+# The local /docs pages answer instantly or not at all
+DOCS_PROBE_TIMEOUT = (1, 1)
+# Streamed legal opinions: fail fast on connect, tolerate slow generation
+STREAM_TIMEOUT = (2, 30)
+
+
+def _pretty_json(obj: Any) -> str:
+    """json.dumps(obj, indent=2), via orjson when installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode("utf-8")
+    return json.dumps(obj, indent=2)
+
+
+def _loads(data: Union[bytes, str]) -> Any:
+    """Parse a JSON response body, via orjson when installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# One adapter (and so one set of connection pools) shared by every session.
+# 429/5xx answers to GET/HEAD probes are retried with backoff, honouring
+# Retry-After; once the retries run out the last response is returned for the
+# caller to report. POSTs (billed, non-idempotent LLM calls) are never resent.
+_ADAPTER = HTTPAdapter(
+    pool_connections=8,
+    pool_maxsize=32,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods={"GET", "HEAD"},
+        raise_on_status=False,
+    ),
+)
+
+
+def _make_session() -> requests.Session:
+    """Keep-alive session on the shared retrying adapter."""
+    session = requests.Session()
+    session.mount("http://", _ADAPTER)
+    session.mount("https://", _ADAPTER)
+    return session
+
+
+# Mock analysis request (the database might not have real data) and the on-disk
+# cache of its response, reused between runs for ANALYSIS_CACHE_TTL seconds
+ANALYSIS_REQUEST = {
+    "document_ids": ["mock-doc-001"],
+    "analysis_types": ["customary_vs_treaty"],
+    "include_jus_cogens": True
+}
+ANALYSIS_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "space_law")
+ANALYSIS_CACHE_TTL = 600
+
+
+def _analysis_cache_path(request: Dict[str, Any]) -> str:
+    digest = hashlib.blake2b(json.dumps(request, sort_keys=True).encode("utf-8"), digest_size=16).hexdigest()
+    return os.path.join(ANALYSIS_CACHE_DIR, f"analysis_{digest}.json")
+
+
+def _load_cached_analysis(request: Dict[str, Any], max_age: Optional[float] = ANALYSIS_CACHE_TTL) -> Optional[Dict[str, Any]]:
+    """Return the cached response for request, or None if missing or older than max_age."""
+    path = _analysis_cache_path(request)
+    try:
+        if max_age is not None and time.time() - os.path.getmtime(path) > max_age:
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
 
-def test_data_collection_api():
-    """Test the data collection API"""
-    print("\n" + "="*60)
-    print("Testing Data Collection API")
-    print("="*60)
+
+def _save_cached_analysis(request: Dict[str, Any], result: Dict[str, Any]):
+    os.makedirs(ANALYSIS_CACHE_DIR, exist_ok=True)
+    with open(_analysis_cache_path(request), "w", encoding="utf-8") as f:
+        json.dump(result, f)
+
+
+# Static instructions for the legal-opinion prompts. They come first and stay
+# byte-identical across calls so provider prompt caching can reuse the prefix;
+# only the analysis results after them change.
+LEGAL_OPINION_INSTRUCTIONS = """You are an expert in international space law. Based on the analysis results
+that follow, provide a comprehensive legal opinion on the classification of the document.
+
+Please provide:
+1. A summary of the legal classification
+2. Key indicators that support this classification
+3. Any potential issues or conflicts
+4. Recommendations for further analysis"""
+
+
+def _analysis_results_text(analysis_result: Dict[str, Any], rendered_json: Optional[str] = None) -> str:
+    """Dynamic part of the legal-opinion prompt.
+
+    rendered_json is analysis_result already passed through _pretty_json();
+    main() renders it once and hands it to every prompt builder.
+    """
+    if rendered_json is None:
+        rendered_json = _pretty_json(analysis_result)
+    return f"---\nAnalysis Results:\n{rendered_json}"
+
+
+# Response cache for the legal-opinion prompts; main() disables it with --no-cache
+LLM_CACHE = None
+
+
+def _opinion_scope(analysis_result: Dict[str, Any]) -> str:
+    """Semantic-cache scope of a legal opinion: what must match for it to be reused.
+
+    That is the instructions plus each analysed document's id and
+    classification, so a cached opinion is never printed for a different
+    document or outcome. Results in an unexpected shape get a scope of their
+    own, which leaves only exact prompt matches.
+    """
+    data = analysis_result.get("data") if isinstance(analysis_result, dict) else None
+    analyses = data.get("analyses") if isinstance(data, dict) else None
+    if analyses:
+        decisive = sorted(
+            (str(item.get("document_id")), str((item.get("analysis") or {}).get("classification")))
+            for item in analyses
+        )
+    else:
+        decisive = _pretty_json(analysis_result)
+    scope = json.dumps([LEGAL_OPINION_INSTRUCTIONS, decisive])
+    return hashlib.sha256(scope.encode("utf-8")).hexdigest()
+
+
+def _print_cached_opinion(model: str, prompt: str, label: str, scope: str, results_text: str) -> bool:
+    """Print a cached legal opinion for prompt if there is one.
+
+    Semantic matches are limited to scope and compare only results_text.
+    """
+    if LLM_CACHE is None:
+        return False
+    cached = LLM_CACHE.lookup(model, prompt, scope=scope, embed_text=results_text)
+    if cached is None:
+        return False
+    print(f"✓ Cached LLM Response (no API call)")
+    print(f"\nLegal Opinion from {label}:")
+    print("-" * 60)
+    print(cached)
+    print("-" * 60)
+    return True
+
+
+# How long a cached key-validation result is trusted
+AUTH_CACHE_TTL = 300
+
+
+def _auth_probe(session: requests.Session, url: str, api_key: str):
+    """GET a token-free endpoint (the model list) and return (status_code, body text).
+
+    Definitive answers (200 or 401) are kept in the exact-match cache per URL
+    and key for AUTH_CACHE_TTL seconds, so quick re-runs with the same key skip
+    the network; the text is then empty. The short TTL keeps a revoked key from
+    being reported as valid for long.
+    """
+    key = None
+    if LLM_CACHE is not None:
+        key = LLM_CACHE.cache_key(f"GET {url}", [], credential=api_key)
+        cached = LLM_CACHE.get(key, max_age=AUTH_CACHE_TTL)
+        if cached is not None:
+            print("✓ Using cached authentication result")
+            return int(cached), ""
+    response = session.get(url, timeout=PROBE_TIMEOUT)
+    if key is not None and response.status_code in (200, 401):
+        LLM_CACHE.put(key, str(response.status_code))
+    return response.status_code, response.text
+
+
+def _iter_sse(response: requests.Response):
+    """Yield the decoded JSON data frames of a server-sent-events response."""
+    for line in response.iter_lines():
+        if not line.startswith(b"data:"):
+            continue
+        data = line[5:].strip()
+        if data == b"[DONE]":
+            return
+        yield _loads(data)
+
+
+# Reused sessions: one for the local APIs and Alibaba checks, one per LLM provider
+SESSION = _make_session()
+OPENAI_SESSION = _make_session()
+OPENAI_SESSION.headers.update(OPENAI_HEADERS)
+CLAUDE_SESSION = _make_session()
+CLAUDE_SESSION.headers.update(CLAUDE_HEADERS)
+
+
+def _start_api_probes(executor: ThreadPoolExecutor, base_url: str):
+    """Submit the health GET and docs HEAD for base_url; returns their futures."""
+    return (
+        executor.submit(SESSION.get, f"{base_url}/health", timeout=PROBE_TIMEOUT),
+        executor.submit(SESSION.head, f"{base_url}/docs", allow_redirects=True, timeout=DOCS_PROBE_TIMEOUT),
+    )
+
+
+def _report_api_probes(base_url: str, probes=None) -> bool:
+    """Print the health and docs results for base_url, sending the probes if not given."""
+    if probes is None:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            probes = _start_api_probes(executor, base_url)
+    health, docs = probes
     
     # Test health endpoint
     try:
-        response = requests.get(f"{DATA_COLLECTION_API}/health")
+        response = health.result()
         print(f"✓ Health Check: {response.status_code}")
-        print(f"  Response: {response.json()}")
+        print(f"  Response: {_loads(response.content)}")
     except Exception as e:
         print(f"✗ Health Check Failed: {e}")
         return False
     
     # Test docs endpoint
     try:
-        response = requests.get(f"{DATA_COLLECTION_API}/docs")
+        response = docs.result()
         print(f"✓ API Docs Available: {response.status_code}")
     except Exception as e:
         print(f"✗ API Docs Failed: {e}")
@@ -49,55 +272,60 @@ def test_data_collection_api():
     return True
 
 
-def test_legal_analysis_api():
-    """Test the legal analysis API"""
+def test_data_collection_api(probes=None):
+    """Test the data collection API
+
+    probes are the (health, docs) futures from _start_api_probes(), letting
+    main() send them alongside the other API's probes.
+    """
+    print("\n" + "="*60)
+    print("Testing Data Collection API")
+    print("="*60)
+    return _report_api_probes(DATA_COLLECTION_API, probes)
+
+
+def test_legal_analysis_api(probes=None):
+    """Test the legal analysis API
+
+    probes are the (health, docs) futures from _start_api_probes().
+    """
     print("\n" + "="*60)
     print("Testing Legal Analysis API")
     print("="*60)
-    
-    # Test health endpoint
-    try:
-        response = requests.get(f"{LEGAL_ANALYSIS_API}/health")
-        print(f"✓ Health Check: {response.status_code}")
-        print(f"  Response: {response.json()}")
-    except Exception as e:
-        print(f"✗ Health Check Failed: {e}")
-        return False
-    
-    # Test docs endpoint
-    try:
-        response = requests.get(f"{LEGAL_ANALYSIS_API}/docs")
-        print(f"✓ API Docs Available: {response.status_code}")
-    except Exception as e:
-        print(f"✗ API Docs Failed: {e}")
-    
-    return True
+    return _report_api_probes(LEGAL_ANALYSIS_API, probes)
+
 
+def test_analysis_endpoint(sample_text: str, refresh: bool = False):
+    """Test the analysis endpoint with sample legal text
 
-def test_analysis_endpoint(sample_text: str):
-    """Test the analysis endpoint with sample legal text"""
+    A successful response is cached on disk and reused for ANALYSIS_CACHE_TTL
+    seconds unless refresh is set.
+    """
     print("\n" + "="*60)
     print("Testing Analysis Endpoint")
     print("="*60)
     
-    # Create a mock document ID since database might not have real data
-    test_request = {
-        "document_ids": ["mock-doc-001"],
-        "analysis_types": ["customary_vs_treaty"],
-        "include_jus_cogens": True
-    }
+    test_request = ANALYSIS_REQUEST
+    
+    print(f"\nRequest: {_pretty_json(test_request)}")
     
-    print(f"\nRequest: {json.dumps(test_request, indent=2)}")
+    if not refresh:
+        cached = _load_cached_analysis(test_request)
+        if cached is not None:
+            print("\n✓ Using cached analysis result (pass --refresh to re-run)")
+            return cached
     
     try:
-        response = requests.post(
+        response = SESSION.post(
             f"{LEGAL_ANALYSIS_API}/analyze/customary-vs-treaty",
-            json=test_request,
-            headers={"Content-Type": "application/json"}
+            json=test_request
         )
+        result = _loads(response.content)
         print(f"\n✓ Analysis Request: {response.status_code}")
-        print(f"Response: {json.dumps(response.json(), indent=2)}")
-        return response.json()
+        print(f"Response: {_pretty_json(result)}")
+        if response.status_code == 200:
+            _save_cached_analysis(test_request, result)
+        return result
     except Exception as e:
         print(f"✗ Analysis Request Failed: {e}")
         return None
@@ -131,39 +359,21 @@ def validate_and_test_openai_key():
     
     # Do a mock/dry-run call to verify authentication
     print("\nAttempting mock authentication (no tokens used)...")
-    headers = {
-        "Authorization": f"Bearer {OPENAI_API_KEY}",
-        "Content-Type": "application/json"
-    }
-    
-    payload = {
-        "model": "gpt-4",
-        "messages": [{"role": "user", "content": "test"}],
-        "max_tokens": 1
-    }
-    
     try:
-        # Add a custom header to make it a dry-run if OpenAI supports it
-        # This is just a connection test
-        import requests
-        response = requests.post(
-            OPENAI_API_URL,
-            json=payload,
-            headers=headers,
-            timeout=5
-        )
+        # Listing models validates the key without running inference
+        status_code, text = _auth_probe(OPENAI_SESSION, OPENAI_MODELS_URL, OPENAI_API_KEY)
         
-        if response.status_code == 401:
+        if status_code == 401:
             print("❌ Authentication failed - Invalid API key")
             return False
-        elif response.status_code == 200:
+        elif status_code == 200:
             print("✓ Authentication successful!")
-            print(f"✓ Response status: {response.status_code}")
+            print(f"✓ Response status: {status_code}")
             return True
         else:
-            print(f"⚠ Unexpected response: {response.status_code}")
-            print(f"Response: {response.text[:200]}")
-            return response.status_code < 500
+            print(f"⚠ Unexpected response: {status_code}")
+            print(f"Response: {text[:200]}")
+            return status_code < 500
     except requests.exceptions.Timeout:
         print("❌ Request timeout - Check your internet connection")
         return False
@@ -172,7 +382,7 @@ def validate_and_test_openai_key():
         return False
 
 
-def test_llm_integration_with_openai(analysis_result: Dict[str, Any]):
+def test_llm_integration_with_openai(analysis_result: Dict[str, Any], rendered_json: Optional[str] = None):
     """Test LLM integration with OpenAI"""
     print("\n" + "="*60)
     print("Testing LLM Integration (OpenAI)")
@@ -185,50 +395,48 @@ def test_llm_integration_with_openai(analysis_result: Dict[str, Any]):
         print("2. Update OPENAI_API_KEY in this script")
         return
     
-    # Prepare prompt for LLM
-    prompt = f"""
-You are an expert in international space law. Based on the following analysis results,
-provide a comprehensive legal opinion on the classification of the document:
-
-Analysis Results:
-{json.dumps(analysis_result, indent=2)}
-
-Please provide:
-1. A summary of the legal classification
-2. Key indicators that support this classification
-3. Any potential issues or conflicts
-4. Recommendations for further analysis
-"""
-    
-    headers = {
-        "Authorization": f"Bearer {OPENAI_API_KEY}",
-        "Content-Type": "application/json"
-    }
+    # Prepare prompt for LLM: static instructions as the system prefix, results last
+    results_text = _analysis_results_text(analysis_result, rendered_json)
+    prompt = f"{LEGAL_OPINION_INSTRUCTIONS}\n\n{results_text}"
     
     payload = {
         "model": "gpt-4",
         "messages": [
-            {"role": "system", "content": "You are an expert in international space law."},
-            {"role": "user", "content": prompt}
+            {"role": "system", "content": LEGAL_OPINION_INSTRUCTIONS},
+            {"role": "user", "content": results_text}
         ],
         "temperature": 0.7,
-        "max_tokens": 1000
+        "max_tokens": 1000,
+        "stream": True
     }
     
+    scope = _opinion_scope(analysis_result)
+    if _print_cached_opinion(payload["model"], prompt, "GPT-4", scope, results_text):
+        return
+    
     try:
         print("\nSending request to OpenAI GPT-4...")
-        response = requests.post(OPENAI_API_URL, json=payload, headers=headers)
-        
-        if response.status_code == 200:
-            result = response.json()
-            print(f"✓ LLM Response Received")
-            print(f"\nLegal Opinion from GPT-4:")
-            print("-" * 60)
-            print(result['choices'][0]['message']['content'])
-            print("-" * 60)
-        else:
-            print(f"✗ LLM Request Failed: {response.status_code}")
-            print(f"Error: {response.text}")
+        with OPENAI_SESSION.post(OPENAI_API_URL, json=payload, stream=True, timeout=STREAM_TIMEOUT) as response:
+            if response.status_code == 200:
+                print(f"✓ LLM Response Streaming")
+                print(f"\nLegal Opinion from GPT-4:")
+                print("-" * 60)
+                # Print tokens as they arrive; keep them for the cache
+                parts = []
+                for chunk in _iter_sse(response):
+                    for choice in chunk.get("choices", []):
+                        delta = choice.get("delta", {}).get("content")
+                        if delta:
+                            parts.append(delta)
+                            print(delta, end="", flush=True)
+                print()
+                print("-" * 60)
+                if LLM_CACHE is not None:
+                    LLM_CACHE.store(payload["model"], prompt, "".join(parts), payload["temperature"],
+                                    scope=scope, embed_text=results_text)
+            else:
+                print(f"✗ LLM Request Failed: {response.status_code}")
+                print(f"Error: {response.text}")
     except Exception as e:
         print(f"✗ LLM Integration Failed: {e}")
 
@@ -261,38 +469,21 @@ def validate_and_test_claude_key():
     
     # Do a mock/dry-run call to verify authentication
     print("\nAttempting mock authentication (no tokens used)...")
-    headers = {
-        "x-api-key": CLAUDE_API_KEY,
-        "anthropic-version": "2023-06-01",
-        "content-type": "application/json"
-    }
-    
-    payload = {
-        "model": "claude-3-opus-20240229",
-        "max_tokens": 1,
-        "messages": [{"role": "user", "content": "test"}]
-    }
-    
     try:
-        import requests
-        response = requests.post(
-            CLAUDE_API_URL,
-            json=payload,
-            headers=headers,
-            timeout=5
-        )
+        # Listing models validates the key without running inference
+        status_code, text = _auth_probe(CLAUDE_SESSION, CLAUDE_MODELS_URL, CLAUDE_API_KEY)
         
-        if response.status_code == 401:
+        if status_code == 401:
             print("❌ Authentication failed - Invalid API key")
             return False
-        elif response.status_code == 200:
+        elif status_code == 200:
             print("✓ Authentication successful!")
-            print(f"✓ Response status: {response.status_code}")
+            print(f"✓ Response status: {status_code}")
             return True
         else:
-            print(f"⚠ Unexpected response: {response.status_code}")
-            print(f"Response: {response.text[:200]}")
-            return response.status_code < 500
+            print(f"⚠ Unexpected response: {status_code}")
+            print(f"Response: {text[:200]}")
+            return status_code < 500
     except requests.exceptions.Timeout:
         print("❌ Request timeout - Check your internet connection")
         return False
@@ -300,50 +491,6 @@ def validate_and_test_claude_key():
         print(f"❌ Connection failed: {e}")
         return False
 
-def validate_and_test_alibaba_key():
-    """Validate Alibaba Cloud AccessKeyId/AccessKeySecret for Qwen (mock test)
-    This validates presence and basic format, and optionally checks endpoint reachability.
-    It does not perform a signed model invocation — that requires signed headers.
-    """
-    print("\n" + "="*60)
-    print("Validating Alibaba Cloud Qwen Credentials")
-    print("="*60)
-
-    if not ALIBABA_ACCESS_KEY_ID or not ALIBABA_ACCESS_KEY_SECRET:
-        print("⚠ Alibaba Access Key ID/Secret not set")
-        print("\nTo test with Alibaba Model Studio (Qwen):")
-        print("1. Set ALIBABA_ACCESS_KEY_ID and ALIBABA_ACCESS_KEY_SECRET in this script")
-        print("2. Optionally set ALIBABA_API_ENDPOINT to your Model Studio endpoint (e.g. https://model.cn-beijing.aliyuncs.com)")
-        return False
-
-    # Basic format checks (best-effort)
-    if len(ALIBABA_ACCESS_KEY_ID) < 10 or len(ALIBABA_ACCESS_KEY_SECRET) < 10:
-        print("❌ Alibaba keys look too short; check they were copied correctly")
-        return False
-
-    print("✓ Alibaba keys provided and basic format looks valid")
-    print(f"✓ AccessKeyId length: {len(ALIBABA_ACCESS_KEY_ID)}")
-    print(f"✓ AccessKeySecret length: {len(ALIBABA_ACCESS_KEY_SECRET)}")
-
-    # If an endpoint is provided, check connectivity (no auth)
-    if ALIBABA_API_ENDPOINT:
-        print("\nChecking endpoint reachability (no auth)...")
-        try:
-            import requests
-            resp = requests.head(ALIBABA_API_ENDPOINT, timeout=5)
-            print(f"✓ Endpoint reachable, status: {resp.status_code}")
-            if resp.status_code in (401, 403):
-                print("⚠ Endpoint requires authentication — keys may need signed requests to validate")
-            return True
-        except Exception as e:
-            print(f"⚠ Could not reach endpoint: {e}")
-            print("You can still run a signed Qwen test if you provide the endpoint and allow a signed request test.")
-            return True
-
-    print("Note: No endpoint provided — keys look present. To fully validate Qwen invocation, set `ALIBABA_API_ENDPOINT` and allow a signed test.")
-    return True
-
-
 def validate_and_test_alibaba_key():
     """Validate Alibaba Cloud credentials and connectivity without consuming tokens"""
     print("\n" + "="*60)
@@ -352,10 +499,10 @@ def validate_and_test_alibaba_key():
 
     if not ALIBABA_ACCESS_KEY_ID or not ALIBABA_ACCESS_KEY_SECRET:
         print("⚠ Alibaba Access Key ID/Secret not set")
-        print("\nTo test with Alibaba Cloud:")
+        print("\nTo test with Alibaba Model Studio (Qwen):")
         print("1. Create an AccessKey (AccessKeyId and AccessKeySecret) in Alibaba RAM")
         print("2. Set ALIBABA_ACCESS_KEY_ID and ALIBABA_ACCESS_KEY_SECRET in this script")
-        print("3. Optionally set ALIBABA_API_ENDPOINT to your region's endpoint")
+        print("3. Optionally set ALIBABA_API_ENDPOINT to your Model Studio endpoint (e.g. https://model.cn-beijing.aliyuncs.com)")
         return False
 
     print("✓ Alibaba Access Key ID provided")
@@ -365,9 +512,10 @@ def validate_and_test_alibaba_key():
     if ALIBABA_API_ENDPOINT:
         print(f"\nTesting connectivity to endpoint: {ALIBABA_API_ENDPOINT}")
         try:
-            import requests
-            resp = requests.get(ALIBABA_API_ENDPOINT, timeout=5)
+            resp = SESSION.head(ALIBABA_API_ENDPOINT, timeout=PROBE_TIMEOUT)
             print(f"✓ Endpoint reachable, status code: {resp.status_code}")
+            if resp.status_code in (401, 403):
+                print("⚠ Endpoint requires authentication — keys may need signed requests to validate")
             return True
         except requests.exceptions.RequestException as e:
             print(f"⚠ Unable to reach endpoint: {e}")
@@ -376,10 +524,11 @@ def validate_and_test_alibaba_key():
 
     # No endpoint provided; format checks only
     print("✓ Credentials look well-formed (no connectivity test performed)")
+    print("Note: To fully validate Qwen invocation, set `ALIBABA_API_ENDPOINT` and allow a signed test.")
     return True
 
 
-def test_llm_integration_with_claude(analysis_result: Dict[str, Any]):
+def test_llm_integration_with_claude(analysis_result: Dict[str, Any], rendered_json: Optional[str] = None):
     """Test LLM integration with Claude/Anthropic"""
     print("\n" + "="*60)
     print("Testing LLM Integration (Claude/Anthropic)")
@@ -392,71 +541,151 @@ def test_llm_integration_with_claude(analysis_result: Dict[str, Any]):
         print("2. Update CLAUDE_API_KEY in this script")
         return
     
-    # Prepare prompt for LLM
-    prompt = f"""You are an expert in international space law. Based on the following analysis results,
-provide a comprehensive legal opinion on the classification of the document:
-
-Analysis Results:
-{json.dumps(analysis_result, indent=2)}
-
-Please provide:
-1. A summary of the legal classification
-2. Key indicators that support this classification
-3. Any potential issues or conflicts
-4. Recommendations for further analysis"""
-    
-    headers = {
-        "x-api-key": CLAUDE_API_KEY,
-        "anthropic-version": "2023-06-01",
-        "content-type": "application/json"
-    }
+    # Prepare prompt for LLM: cacheable static instructions first, results last
+    results_text = _analysis_results_text(analysis_result, rendered_json)
+    prompt = f"{LEGAL_OPINION_INSTRUCTIONS}\n\n{results_text}"
     
     payload = {
         "model": "claude-3-opus-20240229",
         "max_tokens": 1024,
         "messages": [
-            {"role": "user", "content": prompt}
-        ]
+            {"role": "user", "content": [
+                {"type": "text", "text": LEGAL_OPINION_INSTRUCTIONS, "cache_control": {"type": "ephemeral"}},
+                {"type": "text", "text": results_text}
+            ]}
+        ],
+        "stream": True
     }
     
+    scope = _opinion_scope(analysis_result)
+    if _print_cached_opinion(payload["model"], prompt, "Claude", scope, results_text):
+        return
+    
     try:
         print("\nSending request to Claude (Anthropic)...")
-        response = requests.post(CLAUDE_API_URL, json=payload, headers=headers)
-        
-        if response.status_code == 200:
-            result = response.json()
-            print(f"✓ LLM Response Received")
-            print(f"\nLegal Opinion from Claude:")
-            print("-" * 60)
-            print(result['content'][0]['text'])
-            print("-" * 60)
-        else:
-            print(f"✗ LLM Request Failed: {response.status_code}")
-            print(f"Error: {response.text}")
+        with CLAUDE_SESSION.post(CLAUDE_API_URL, json=payload, stream=True, timeout=STREAM_TIMEOUT) as response:
+            if response.status_code == 200:
+                print(f"✓ LLM Response Streaming")
+                print(f"\nLegal Opinion from Claude:")
+                print("-" * 60)
+                # Print text deltas as they arrive; keep them for the cache
+                parts = []
+                for event in _iter_sse(response):
+                    if event.get("type") == "content_block_delta":
+                        delta = event["delta"].get("text")
+                        if delta:
+                            parts.append(delta)
+                            print(delta, end="", flush=True)
+                    elif event.get("type") == "message_stop":
+                        break
+                print()
+                print("-" * 60)
+                if LLM_CACHE is not None:
+                    # Claude's default temperature is 1.0
+                    LLM_CACHE.store(payload["model"], prompt, "".join(parts), payload.get("temperature", 1.0),
+                                    scope=scope, embed_text=results_text)
+            else:
+                print(f"✗ LLM Request Failed: {response.status_code}")
+                print(f"Error: {response.text}")
     except Exception as e:
         print(f"✗ LLM Integration Failed: {e}")
 
 
-def main():
+@lru_cache(maxsize=8)
+def _configured_providers(alibaba_key_id: str, alibaba_key_secret: str, alibaba_endpoint: str,
+                          claude_key: str, openai_key: str) -> Tuple[str, ...]:
+    """llm_selector.configured_providers() memoized on the credential values."""
+    from shared import llm_selector
+    return tuple(llm_selector.configured_providers({
+        "ALIBABA_ACCESS_KEY_ID": alibaba_key_id,
+        "ALIBABA_ACCESS_KEY_SECRET": alibaba_key_secret,
+        "ALIBABA_API_ENDPOINT": alibaba_endpoint,
+        "CLAUDE_API_KEY": claude_key,
+        "OPENAI_API_KEY": openai_key,
+    }))
+
+
+class _ThreadOutput(io.TextIOBase):
+    """stdout proxy that collects each capturing thread's prints in its own buffer."""
+
+    def __init__(self, target):
+        self._target = target
+        self._local = threading.local()
+
+    def write(self, text):
+        buffer = getattr(self._local, "buffer", None)
+        return (self._target if buffer is None else buffer).write(text)
+
+    def flush(self):
+        self._target.flush()
+
+    def capture(self, func):
+        """Run func in the current thread and return (result, printed output)."""
+        self._local.buffer = io.StringIO()
+        try:
+            return func(), self._local.buffer.getvalue()
+        finally:
+            self._local.buffer = None
+
+
+async def _run_validations(*validators):
+    """Run the validators concurrently in worker threads.
+
+    Their network probes overlap, but each one's output is replayed in order so
+    the report reads the same as a sequential run.
+    """
+    real_stdout = sys.stdout
+    proxy = _ThreadOutput(real_stdout)
+    sys.stdout = proxy
+    try:
+        results = await asyncio.gather(*(asyncio.to_thread(proxy.capture, v) for v in validators))
+    finally:
+        sys.stdout = real_stdout
+    for _, output in results:
+        real_stdout.write(output)
+    return [result for result, _ in results]
+
+
+def main(argv=None):
     """Main test function"""
+    global LLM_CACHE
+    parser = argparse.ArgumentParser(description="Space Law AI Assistant LLM integration test")
+    parser.add_argument("--no-cache", action="store_true", help="always call the LLM APIs instead of reusing cached responses")
+    parser.add_argument("--refresh", action="store_true", help="re-run the analysis request instead of reusing its cached result")
+    args = parser.parse_args(argv)
+    # Imported here so --help does not pay for the HTTP client and cache stack
+    from shared import llm_selector
+    if not args.no_cache:
+        from shared.llm_cache import LLMCache
+        LLM_CACHE = LLMCache()
+
     print("\n" + "="*80)
     print("SPACE LAW AI ASSISTANT - LLM INTEGRATION TEST")
     print("="*80)
     
-    # Test APIs
-    dc_ok = test_data_collection_api()
-    la_ok = test_legal_analysis_api()
+    # Test APIs: all four health/docs probes are in flight at once
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        dc_probes = _start_api_probes(executor, DATA_COLLECTION_API)
+        la_probes = _start_api_probes(executor, LEGAL_ANALYSIS_API)
+        dc_ok = test_data_collection_api(dc_probes)
+        la_ok = test_legal_analysis_api(la_probes)
     
     if not (dc_ok and la_ok):
         print("\n⚠ One or more APIs are not responding. Make sure they are running.")
         print("  Data Collection API: http://localhost:8001")
         print("  Legal Analysis API: http://localhost:8002")
-        return
-    
-    # Test analysis endpoint
-    analysis_result = test_analysis_endpoint("")
+        analysis_result = None if args.refresh else _load_cached_analysis(ANALYSIS_REQUEST, max_age=None)
+        if analysis_result is None:
+            return
+        print("\n⚠ Continuing with the last cached analysis result")
+    else:
+        # Test analysis endpoint
+        analysis_result = test_analysis_endpoint("", refresh=args.refresh)
     
     if analysis_result:
+        # Rendered once and shared by every provider's prompt
+        rendered = _pretty_json(analysis_result)
+
         # Test LLM integration
         print("\n" + "="*80)
         print("LLM INTEGRATION SETUP")
@@ -469,22 +698,6 @@ def main():
         print("   - Get API key: https://console.anthropic.com/")
         print("   - Set CLAUDE_API_KEY variable in this script")
         
-        # Validate API keys without using tokens
-        print("\n" + "="*80)
-        print("VALIDATING API KEYS (Mock Authentication Tests)")
-        print("="*80)
-        
-        openai_valid = validate_and_test_openai_key()
-        claude_valid = validate_and_test_claude_key()
-        alibaba_valid = validate_and_test_alibaba_key()
-        
-        print("\n" + "="*80)
-        print("SUMMARY")
-        print("="*80)
-        print(f"\nOpenAI API Key: {'✓ Valid' if openai_valid else '❌ Invalid/Not Set'}")
-        print(f"Claude API Key: {'✓ Valid' if claude_valid else '❌ Invalid/Not Set'}")
-        print(f"Alibaba Credentials: {'✓ Provided' if alibaba_valid else '❌ Not Provided/Invalid'}")
-        
         # Provider selection (Qwen -> Claude -> OpenAI)
         env = {
             "ALIBABA_ACCESS_KEY_ID": ALIBABA_ACCESS_KEY_ID,
@@ -493,35 +706,71 @@ def main():
             "CLAUDE_API_KEY": CLAUDE_API_KEY,
             "OPENAI_API_KEY": OPENAI_API_KEY,
         }
+        configured = _configured_providers(
+            ALIBABA_ACCESS_KEY_ID, ALIBABA_ACCESS_KEY_SECRET, ALIBABA_API_ENDPOINT, CLAUDE_API_KEY, OPENAI_API_KEY)
+        provider = configured[0] if configured else None
 
-        provider = llm_selector.select_provider(env)
+        # Validate API keys without using tokens. Only the selected provider and
+        # its first fallback are probed; with nothing configured every validator
+        # runs, which just prints the setup hints.
+        print("\n" + "="*80)
+        print("VALIDATING API KEYS (Mock Authentication Tests)")
+        print("="*80)
+        
+        validators = {
+            "openai": validate_and_test_openai_key,
+            "claude": validate_and_test_claude_key,
+            "alibaba": validate_and_test_alibaba_key,
+        }
+        probed = list(configured[:2]) or list(validators)
+        results = dict(zip(probed, asyncio.run(_run_validations(*(validators[name] for name in probed)))))
+        openai_valid = results.get("openai", False)
+        claude_valid = results.get("claude", False)
+        alibaba_valid = results.get("alibaba", False)
+
+        def status(name, ok, bad):
+            if name not in results:
+                return "➖ Not probed (fallback)"
+            return ok if results[name] else bad
+
+        print("\n" + "="*80)
+        print("SUMMARY")
+        print("="*80)
+        print(f"\nOpenAI API Key: {status('openai', '✓ Valid', '❌ Invalid/Not Set')}")
+        print(f"Claude API Key: {status('claude', '✓ Valid', '❌ Invalid/Not Set')}")
+        print(f"Alibaba Credentials: {status('alibaba', '✓ Provided', '❌ Not Provided/Invalid')}")
+        
         print(f"\nSelected provider: {provider}")
 
         if provider == "alibaba":
+            # Only the Qwen call goes through llm_selector's client; the OpenAI
+            # and Claude sessions are already warm from their key validators.
+            llm_selector.warmup({key: env[key] for key in
+                                 ("ALIBABA_ACCESS_KEY_ID", "ALIBABA_ACCESS_KEY_SECRET", "ALIBABA_API_ENDPOINT")})
             try:
                 print("\nCalling Alibaba Qwen (signed request)...")
                 resp = llm_selector.call_qwen_signed(
                     endpoint=ALIBABA_API_ENDPOINT,
                     model="qwen-large",
-                    prompt=json.dumps(analysis_result, indent=2),
+                    prompt=rendered,
                     access_key=ALIBABA_ACCESS_KEY_ID,
                     access_secret=ALIBABA_ACCESS_KEY_SECRET,
                 )
                 print("✓ Alibaba response:")
-                print(json.dumps(resp, indent=2)[:2000])
+                print(_pretty_json(resp)[:2000])
             except Exception as e:
                 print(f"✗ Alibaba request failed: {e}")
                 # fallback to Claude if available
                 if claude_valid:
                     print("Falling back to Claude...")
-                    test_llm_integration_with_claude(analysis_result)
+                    test_llm_integration_with_claude(analysis_result, rendered)
                 elif openai_valid:
                     print("Falling back to OpenAI...")
-                    test_llm_integration_with_openai(analysis_result)
+                    test_llm_integration_with_openai(analysis_result, rendered)
         elif provider == "claude":
-            test_llm_integration_with_claude(analysis_result)
+            test_llm_integration_with_claude(analysis_result, rendered)
         elif provider == "openai":
-            test_llm_integration_with_openai(analysis_result)
+            test_llm_integration_with_openai(analysis_result, rendered)
         else:
             print("No LLM credentials found; skipping full LLM tests.")
     